@@ -1,4 +1,5 @@
 import os
+import multiprocessing
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
@@ -8,4 +9,80 @@ app = Flask(__name__)
 
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+# maximum number of verified tokens kept in memory and how long (in seconds)
+# an entry may be served before the token is verified against the DB again
+app.config['AUTH_CACHE_SIZE'] = int(os.environ.get('AUTH_CACHE_SIZE', 1024))
+app.config['AUTH_CACHE_TTL'] = int(os.environ.get('AUTH_CACHE_TTL', 300))
+# when enabled the claims of a valid token are trusted without loading the user
+app.config['AUTH_STATELESS'] = os.environ.get(
+    'AUTH_STATELESS', '').lower() in ('1', 'true', 'yes')
+# password hashing runs in a pool of HASH_POOL_SIZE processes (0 hashes in the
+# request thread); at most HASH_POOL_QUEUE hashes may be pending at once. Every
+# gunicorn worker (WEB_CONCURRENCY of them) has a pool of its own, so by
+# default the CPUs of the host are shared between them
+app.config['HASH_POOL_SIZE'] = int(os.environ.get(
+    'HASH_POOL_SIZE', max(1, multiprocessing.cpu_count() // int(
+        os.environ.get('WEB_CONCURRENCY', 1)))))
+app.config['HASH_POOL_QUEUE'] = int(os.environ.get('HASH_POOL_QUEUE', 8))
+app.config['HASH_POOL_TIMEOUT'] = int(os.environ.get('HASH_POOL_TIMEOUT', 10))
+# seconds a batch of passwords, e.g. of a bulk registration, may take to hash
+app.config['HASH_POOL_BATCH_TIMEOUT'] = int(
+    os.environ.get('HASH_POOL_BATCH_TIMEOUT', 60))
+# sha512_crypt rounds for new password hashes, see `python models.py
+# calibrate_hashing`; passwords hashed differently are re-hashed on login
+app.config['PASSWORD_HASH_ROUNDS'] = int(
+    os.environ.get('PASSWORD_HASH_ROUNDS', 0)) or None
+# logins are written to the session table in batches of SESSION_FLUSH_SIZE
+# or every SESSION_FLUSH_INTERVAL seconds, logouts at the end of their
+# request; logouts made by other processes are picked up every
+# SESSION_SYNC_INTERVAL seconds
+app.config['SESSION_FLUSH_SIZE'] = int(
+    os.environ.get('SESSION_FLUSH_SIZE', 100))
+app.config['SESSION_FLUSH_INTERVAL'] = int(
+    os.environ.get('SESSION_FLUSH_INTERVAL', 5))
+app.config['SESSION_SYNC_INTERVAL'] = int(
+    os.environ.get('SESSION_SYNC_INTERVAL', 5))
+# login and registration attempts allowed per LOGIN_RATE_PERIOD seconds for
+# each username and each client address; RATE_LIMIT_PROXY_COUNT is the number
+# of proxies (e.g. the Heroku router) in front of the app that append to
+# X-Forwarded-For
+app.config['LOGIN_RATE_LIMIT'] = int(os.environ.get('LOGIN_RATE_LIMIT', 10))
+app.config['LOGIN_RATE_PERIOD'] = int(os.environ.get('LOGIN_RATE_PERIOD', 60))
+app.config['RATE_LIMIT_MAX_KEYS'] = int(
+    os.environ.get('RATE_LIMIT_MAX_KEYS', 10000))
+app.config['RATE_LIMIT_PROXY_COUNT'] = int(
+    os.environ.get('RATE_LIMIT_PROXY_COUNT', 0))
+# seconds after logging in past which a token can no longer be refreshed
+app.config['AUTH_MAX_SESSION_LIFETIME'] = int(
+    os.environ.get('AUTH_MAX_SESSION_LIFETIME', 24 * 60 * 60))
+# comma separated usernames of the users allowed to use admin routes
+app.config['ADMINS'] = [
+    username.strip()
+    for username in os.environ.get('ADMINS', '').split(',') if username.strip()
+]
+# maximum number of users that may be registered in one bulk request, and
+# per LOGIN_RATE_PERIOD seconds by each admin and each client address
+app.config['BULK_REGISTRATION_MAX'] = int(
+    os.environ.get('BULK_REGISTRATION_MAX', 100))
+app.config['BULK_REGISTRATION_RATE_LIMIT'] = int(
+    os.environ.get('BULK_REGISTRATION_RATE_LIMIT', 500))
+# list endpoints stream their JSON array when STREAM_LISTS is enabled or the
+# request has `?stream=true`, reading STREAM_BATCH_SIZE rows at a time
+app.config['STREAM_LISTS'] = os.environ.get(
+    'STREAM_LISTS', '').lower() in ('1', 'true', 'yes')
+app.config['STREAM_BATCH_SIZE'] = int(
+    os.environ.get('STREAM_BATCH_SIZE', 500))
+# JSON module used to encode responses: `auto` picks the fastest installed of
+# ujson (only with JSON_COMPACT), simplejson and json; JSON_COMPACT drops
+# whitespace between items
+app.config['JSON_ENCODER'] = os.environ.get('JSON_ENCODER', 'auto')
+app.config['JSON_COMPACT'] = os.environ.get(
+    'JSON_COMPACT', '').lower() in ('1', 'true', 'yes')
+# rows per page of list responses unless `?page_size=` asks for another size,
+# which may not exceed MAX_PAGE_SIZE
+app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', 50))
+app.config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', 500))
+# largest number of ids a list route may be asked for at once with `?ids=`
+app.config['MAX_MULTI_GET_IDS'] = int(
+    os.environ.get('MAX_MULTI_GET_IDS', 100))
 db = SQLAlchemy(app)
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Compares the cost of encoding list payloads with every installed JSON module,
+with and without compact mode.
+
+Run from the repository root with `python -m benchmarks.encoders`.
+"""
+import sys
+import timeit
+
+from models import Goods
+from restful.representations import ENCODERS, make_dumps
+from serializer import GoodsSchema, compile_schema
+
+
+def main(count=10000, repeat=5):
+    dump_good = compile_schema(GoodsSchema)
+    payload = [
+        dump_good(Goods(id=i, name=u'Good {0}'.format(i), price=i * 10,
+                        necessary=bool(i % 2)))
+        for i in range(count)
+    ]
+    print('{0:<20}{1:>12}{2:>12}'.format('encoder', 'us/row', 'bytes/row'))
+    for name in ENCODERS:
+        for compact in (False, True):
+            try:
+                dumps = make_dumps(name, compact)
+            except ImportError:
+                print('{0:<20}{1:>12}'.format(name, 'missing'))
+                break
+            elapsed = min(timeit.repeat(
+                lambda: dumps(payload), number=1, repeat=repeat))
+            label = name + (' compact' if compact else '')
+            print('{0:<20}{1:>12.2f}{2:>12.1f}'.format(
+                label, elapsed / count * 1e6,
+                len(dumps(payload)) / float(count)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
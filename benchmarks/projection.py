@@ -0,0 +1,87 @@
+"""
+Compares reading a user's goods as ORM instances with reading only the
+serialized columns, as the list endpoints do.
+
+Run from the repository root with `python -m benchmarks.projection`; rows are
+inserted into an in-memory SQLite database unless BENCHMARK_DATABASE_URL is
+set.
+"""
+import gc
+import os
+import sys
+import time
+
+from app import app
+from models import db, Goods, User
+from serializer import GoodsSchema, compile_schema, schema_columns
+
+dump = compile_schema(GoodsSchema)
+
+
+def setup(count):
+    """Creates a user owning `count` goods and returns the user id."""
+    db.create_all()
+    user = User(username='benchmark')
+    db.session.add(user)
+    db.session.commit()
+    db.session.execute(Goods.__table__.insert(), [
+        {'name': u'Good {0}'.format(i), 'price': i, 'necessary': bool(i % 2),
+         'user_id': user.user_id}
+        for i in range(count)
+    ])
+    db.session.commit()
+    return user.user_id
+
+
+def orm_query(user_id):
+    return Goods.query.filter_by(user_id=user_id)
+
+
+def projected_query(user_id):
+    return db.session.query(*schema_columns(Goods, GoodsSchema)).filter(
+        Goods.user_id == user_id)
+
+
+def rows_per_second(query, repeat):
+    """Returns how many rows per second `query` is read and dumped at."""
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.time()
+        count = len([dump(row) for row in query])
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def memory_per_row(query):
+    """
+    Returns the number of objects and bytes the garbage collector tracks per
+    row while the rows of `query` are held in memory.
+    """
+    db.session.expunge_all()
+    gc.collect()
+    before = set(id(obj) for obj in gc.get_objects())
+    rows = query.all()
+    new = [obj for obj in gc.get_objects() if id(obj) not in before]
+    size = sum(sys.getsizeof(obj) for obj in new)
+    return len(new) / float(len(rows)), size / float(len(rows))
+
+
+def main(count=20000, repeat=5):
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'BENCHMARK_DATABASE_URL', 'sqlite://')
+    with app.app_context():
+        user_id = setup(count)
+        print('{0:<12}{1:>14}{2:>14}{3:>14}'.format(
+            'query', 'rows/sec', 'objects/row', 'bytes/row'))
+        for name, build in [('orm', orm_query), ('projected', projected_query)]:
+            speed = rows_per_second(build(user_id), repeat)
+            objects, size = memory_per_row(build(user_id))
+            print('{0:<12}{1:>14.0f}{2:>14.1f}{3:>14.0f}'.format(
+                name, speed, objects, size))
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,98 @@
+"""
+Measures the latency of listing one page of a user's goods as the goods
+table grows, with and without the composite user_id indexes.
+
+Run from the repository root with `python -m benchmarks.scale [sizes...]`,
+e.g. `python -m benchmarks.scale 10000 100000 1000000 10000000`. Rows are
+spread over USERS users and inserted into an in-memory SQLite database
+unless BENCHMARK_DATABASE_URL is set.
+"""
+import os
+import random
+import sys
+import time
+
+from app import app
+from models import db, Goods, User
+from restful.pagination import after, ordering
+from serializer import GoodsSchema, compile_schema, schema_columns
+
+USERS = 1000
+PAGE_SIZE = 50
+CHUNK_SIZE = 10000
+# the orders lists are served in: by id, by price descending, by name
+ORDERS = [
+    ('id', [(Goods.id, False)]),
+    ('-price', [(Goods.price, True), (Goods.id, True)]),
+    ('name', [(Goods.name, False), (Goods.id, False)]),
+]
+
+
+def grow(count, target):
+    """Inserts goods until the table holds `target` rows."""
+    while count < target:
+        size = min(CHUNK_SIZE, target - count)
+        db.session.execute(Goods.__table__.insert(), [
+            {'name': u'Good {0}'.format(random.randint(0, 10 ** 6)),
+             'price': random.randint(1, 10 ** 5), 'necessary': True,
+             'user_id': random.randint(1, USERS)}
+            for _ in range(size)
+        ])
+        count += size
+    db.session.commit()
+    return count
+
+
+def page_latency(keys, repeat):
+    """
+    Returns the median milliseconds taken to read and dump the second page
+    of a random user's goods in the order of `keys`.
+    """
+    dump_good = compile_schema(GoodsSchema)
+    timings = []
+    for _ in range(repeat):
+        user_id = random.randint(1, USERS)
+        query = db.session.query(*schema_columns(Goods, GoodsSchema)).filter(
+            Goods.user_id == user_id).order_by(*ordering(keys))
+        first = query.limit(PAGE_SIZE).all()
+        if not first:
+            continue
+        last = first[-1]
+        values = [getattr(last, column.key) for column, _ in keys]
+        start = time.time()
+        rows = query.filter(after(keys, values)).limit(PAGE_SIZE + 1).all()
+        [dump_good(row) for row in rows]
+        timings.append((time.time() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2] if timings else 0.0
+
+
+def main(*sizes):
+    sizes = [int(size) for size in sizes] or [10000, 100000, 1000000]
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'BENCHMARK_DATABASE_URL', 'sqlite://')
+    indexes = Goods.__table__.indexes
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {'username': 'user{0}'.format(i)} for i in range(USERS)])
+        count = 0
+        print('{0:>10} {1:<8}{2:>14}{3:>14}'.format(
+            'rows', 'order', 'indexed ms', 'unindexed ms'))
+        for size in sorted(sizes):
+            count = grow(count, size)
+            for name, keys in ORDERS:
+                indexed = page_latency(keys, 50)
+                for index in indexes:
+                    index.drop(db.engine)
+                # full scans are slow on large tables, time fewer of them
+                unindexed = page_latency(keys, 5)
+                for index in indexes:
+                    index.create(db.engine)
+                print('{0:>10} {1:<8}{2:>14.2f}{3:>14.2f}'.format(
+                    size, name, indexed, unindexed))
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
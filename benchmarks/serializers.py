@@ -0,0 +1,57 @@
+"""
+Compares marshmallow dumping with the compiled dumpers from serializer.py.
+
+Run from the repository root with `python -m benchmarks.serializers`.
+"""
+import sys
+import timeit
+
+from models import Goods, Services, Accounts, Outlets
+from serializer import (
+    GoodsSchema, ServicesSchema, AccountsSchema, OutletSchema, compile_schema
+)
+
+
+def make_rows(count):
+    """Returns `count` transient instances of every serialized model."""
+    return {
+        GoodsSchema: [
+            Goods(id=i, name=u'Good {0}'.format(i), price=i * 10,
+                  necessary=bool(i % 2))
+            for i in range(count)
+        ],
+        ServicesSchema: [
+            Services(id=i, name=u'Service {0}'.format(i), price=i * 10)
+            for i in range(count)
+        ],
+        AccountsSchema: [
+            Accounts(name=u'Account {0}'.format(i), phone_no=u'0700000000',
+                     account_no=u'{0}'.format(i), account_provider=u'Bank')
+            for i in range(count)
+        ],
+        OutletSchema: [
+            Outlets(u'Outlet {0}'.format(i), u'P.O. Box {0}'.format(i),
+                    u'Nairobi')
+            for i in range(count)
+        ],
+    }
+
+
+def main(count=10000, repeat=5):
+    print('{0:<16}{1:>16}{2:>16}{3:>10}'.format(
+        'schema', 'marshmallow us', 'compiled us', 'speedup'))
+    for schema_class, rows in make_rows(count).items():
+        schema = schema_class()
+        dump = compile_schema(schema_class)
+        assert schema.dump(rows, many=True).data == [dump(r) for r in rows]
+        reflective = min(timeit.repeat(
+            lambda: schema.dump(rows, many=True), number=1, repeat=repeat))
+        compiled = min(timeit.repeat(
+            lambda: [dump(r) for r in rows], number=1, repeat=repeat))
+        print('{0:<16}{1:>16.2f}{2:>16.2f}{3:>9.1f}x'.format(
+            schema_class.__name__, reflective / count * 1e6,
+            compiled / count * 1e6, reflective / compiled))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,150 @@
+from sqlalchemy import and_, exists
+
+from app import db
+from models import bump_versions
+
+
+def owned(model, user_id):
+    """
+    Returns a query of the rows of `model` owned by the user of id `user_id`.
+    """
+    return model.query.filter(model.user_id == user_id)
+
+
+def _is_owned(model, row_id, user_id):
+    return and_(model.id == row_id, model.user_id == user_id)
+
+
+def _missing_status(model, row_id):
+    # the row is not owned by the user, tell whether it exists at all
+    if db.session.query(exists().where(model.id == row_id)).scalar():
+        return 403
+    return 404
+
+
+def _supports_returning():
+    return getattr(db.session.get_bind().dialect, 'implicit_returning', False)
+
+
+def _referencing_columns(table):
+    # foreign key columns of other tables pointing at rows of `table`
+    return [
+        fk.parent
+        for other in db.metadata.tables.values() if other is not table
+        for fk in other.foreign_keys if fk.column.table is table
+    ]
+
+
+def lookup(model, row_id, user_id, *options):
+    """
+    Returns the row of `model` of id `row_id` if it is owned by the user of
+    id `user_id`, along with the HTTP status of the lookup.
+
+    The row is loaded by one query filtered on both its id and its owner, so
+    probing ids of other users never loads their rows. Only when no row is
+    found does a cheap existence probe tell a row owned by someone else
+    (403) from a missing one (404). `options` are applied to the query, e.g.
+    to load only some columns.
+    """
+    row = owned(model, user_id).filter(model.id == row_id).options(
+        *options).first()
+    if row is not None:
+        return row, 200
+    return None, _missing_status(model, row_id)
+
+
+def lookup_many(model, row_ids, user_id, *columns):
+    """
+    Returns the `columns` of the rows of `model` whose ids are in `row_ids`
+    and that are owned by the user of id `user_id`, keyed by id, along with
+    the HTTP status of looking up each id.
+
+    The rows are read by a single query filtered on both the ids and their
+    owner. The ids not found are probed by one more query, which only reads
+    ids, to tell rows owned by someone else (403) from missing ones (404).
+    """
+    if 'id' not in [column.key for column in columns]:
+        columns += (model.id,)
+    rows = dict(
+        (row.id, row) for row in db.session.query(*columns).filter(
+            model.user_id == user_id, model.id.in_(row_ids)))
+    statuses = dict((row_id, 200) for row_id in rows)
+    missing = [row_id for row_id in row_ids if row_id not in rows]
+    if missing:
+        existing = set(
+            row_id for row_id, in db.session.query(model.id).filter(
+                model.id.in_(missing)))
+        for row_id in missing:
+            statuses[row_id] = 403 if row_id in existing else 404
+    return rows, statuses
+
+
+def probe(model, row_id, user_id):
+    """
+    Returns the HTTP status of looking up the row of `model` of id `row_id`
+    as the user of id `user_id`, without loading it.
+    """
+    owned_row = exists().where(_is_owned(model, row_id, user_id))
+    if db.session.query(owned_row).scalar():
+        return 200
+    return _missing_status(model, row_id)
+
+
+def update_owned(model, row_id, user_id, values, columns=None):
+    """
+    Sets `values` on the row of `model` of id `row_id` if it is owned by the
+    user of id `user_id` and returns its `columns` along with the HTTP status
+    of the update.
+
+    The row is changed by a single UPDATE filtered on both its id and its
+    owner, without being loaded first. Where the backend supports RETURNING
+    the columns come back from the UPDATE itself, elsewhere they are read by
+    one query right after it. Without `columns` nothing is read back and
+    None is returned in place of the row. The version of the collection is
+    bumped in the same transaction, which the caller commits.
+    """
+    condition = _is_owned(model, row_id, user_id)
+    if not values:
+        if columns is None:
+            return None, probe(model, row_id, user_id)
+        row = db.session.query(*columns).filter(condition).first()
+        if row is None:
+            return None, _missing_status(model, row_id)
+        return row, 200
+
+    statement = model.__table__.update().where(condition).values(**values)
+    if columns is not None and _supports_returning():
+        row = db.session.execute(statement.returning(*columns)).first()
+        updated = row is not None
+    else:
+        updated = db.session.execute(statement).rowcount > 0
+        row = None
+        if updated and columns is not None:
+            row = db.session.query(*columns).filter(condition).first()
+    if not updated:
+        return None, _missing_status(model, row_id)
+    bump_versions(db.session.connection(), user_id, model.__tablename__)
+    return row, 200
+
+
+def delete_owned(model, row_id, user_id):
+    """
+    Deletes the row of `model` of id `row_id` if it is owned by the user of
+    id `user_id` and returns the HTTP status of the deletion.
+
+    The row is deleted by a single DELETE filtered on both its id and its
+    owner, without being loaded first. Foreign keys of other tables pointing
+    at the row are set to NULL beforehand, as the ORM would, and the version
+    of the collection is bumped in the same transaction, which the caller
+    commits.
+    """
+    condition = _is_owned(model, row_id, user_id)
+    for column in _referencing_columns(model.__table__):
+        db.session.execute(
+            column.table.update().where(column == row_id).where(
+                exists().where(condition)).values({column.name: None}))
+    result = db.session.execute(model.__table__.delete().where(condition))
+    if not result.rowcount:
+        return _missing_status(model, row_id)
+    bump_versions(db.session.connection(), user_id, model.__tablename__)
+    return 204
@@ -0,0 +1,254 @@
+import os
+import time
+import threading
+import multiprocessing
+from contextlib import contextmanager
+
+from passlib.apps import custom_app_context as pwd_context
+from passlib.context import CryptContext
+from passlib.hash import sha512_crypt
+
+_contexts = {}
+
+
+class HashingPoolBusy(Exception):
+    """Raised when no password hashing slot frees up in time."""
+
+
+def get_context(rounds=None):
+    """
+    Returns the passlib context that hashes with `rounds` sha512_crypt rounds.
+
+    Hashes using any other number of rounds are reported as needing an
+    update. Without `rounds` passlib's `custom_app_context` is returned.
+    """
+    if not rounds:
+        return pwd_context
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(
+            schemes=['sha512_crypt', 'sha256_crypt'],
+            deprecated=['sha256_crypt'],
+            sha512_crypt__default_rounds=rounds,
+            sha512_crypt__min_rounds=rounds,
+            sha512_crypt__max_rounds=rounds
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def calibrate(target_ms, probe_rounds=20000, samples=3):
+    """
+    Returns the number of sha512_crypt rounds that take about `target_ms`
+    milliseconds to hash on this host.
+
+    Hash time grows linearly with the number of rounds, so the fastest of
+    `samples` hashes at `probe_rounds` rounds is scaled up to the target.
+    """
+    context = get_context(probe_rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.time()
+        context.encrypt('calibration')
+        timings.append(time.time() - start)
+    rounds = int(probe_rounds * (target_ms / 1000.0) / min(timings))
+    # keep the result readable and within the range sha512_crypt accepts
+    rounds = int(round(rounds, -3))
+    return max(sha512_crypt.min_rounds, min(rounds, sha512_crypt.max_rounds))
+
+
+def _encrypt(password, rounds):
+    return get_context(rounds).encrypt(password)
+
+
+def _encrypt_item(item):
+    return _encrypt(*item)
+
+
+def _verify(password, password_hash, rounds):
+    return get_context(rounds).verify(password, password_hash)
+
+
+def _verify_and_update(password, password_hash, rounds):
+    return get_context(rounds).verify_and_update(password, password_hash)
+
+
+def _call(func, args):
+    # errors are returned rather than raised so that the completion callback,
+    # which frees the slot of the task, runs for failed tasks too
+    try:
+        return True, func(*args)
+    except Exception as e:
+        return False, e
+
+
+class HashingPool(object):
+    """
+    Runs password hashing and verification in a pool of worker processes.
+
+    sha512_crypt is deliberately slow, so hashing inside the request thread
+    stalls every other request served by the same worker. At most
+    `max_pending` operations may be queued or running at once; further
+    requests fail fast with HashingPoolBusy instead of piling up. An
+    operation holds its slot until it completes, even if its caller stopped
+    waiting for it, so abandoned work cannot pile up in the worker queue
+    either. A pool with no processes hashes in the calling thread but still
+    honours the bound.
+    New hashes use `rounds` sha512_crypt rounds, see `get_context`.
+    """
+
+    def __init__(self, processes=0, max_pending=8, timeout=10, rounds=None,
+                 batch_timeout=60):
+        """
+        Instantiates class instance variables upon object instance creation.
+        """
+        self.processes = processes
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.batch_timeout = batch_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._slots_pid = os.getpid()
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def encrypt(self, password):
+        """
+        Returns the hash of the plain text password argument.
+        """
+        return self.run(_encrypt, password, self.rounds)
+
+    def encrypt_many(self, passwords):
+        """
+        Returns the hashes of the plain text passwords argument, in order.
+
+        Every password is hashed as an operation of its own, but the batch
+        never holds more than half of the slots of the pool, so that other
+        requests keep being served while it runs. Rather than failing fast
+        the batch waits for slots to free up, and raises HashingPoolBusy if
+        it is not done within `batch_timeout` seconds.
+        """
+        deadline = time.time() + self.batch_timeout
+        share = max(1, min(self.processes or 1, self.max_pending // 2))
+        hashes = []
+        for start in range(0, len(passwords), share):
+            chunk = passwords[start:start + share]
+            if not self.processes:
+                for password in chunk:
+                    release = self._acquire_by(deadline)
+                    try:
+                        hashes.append(_encrypt(password, self.rounds))
+                    finally:
+                        release()
+                continue
+            results = [
+                self._submit(
+                    _encrypt, (password, self.rounds),
+                    self._acquire_by(deadline))
+                for password in chunk
+            ]
+            hashes.extend(
+                self._result(result, max(deadline - time.time(), 0))
+                for result in results)
+        return hashes
+
+    def verify(self, password, password_hash):
+        """
+        Returns True if the plain text password matches `password_hash` and
+        False if otherwise.
+        """
+        return self.run(_verify, password, password_hash, self.rounds)
+
+    def verify_and_update(self, password, password_hash):
+        """
+        Verifies the plain text password against `password_hash`.
+
+        Returns a `(verified, new_hash)` tuple where `new_hash` is a hash of
+        the password under the current rounds policy if `password_hash` does
+        not follow it, and None if otherwise.
+        """
+        return self.run(
+            _verify_and_update, password, password_hash, self.rounds)
+
+    def run(self, func, *args):
+        """
+        Calls `func` with `args` in the pool and returns its result.
+
+        Raises HashingPoolBusy if `max_pending` operations are already in
+        flight or if the result is not ready within `timeout` seconds.
+        """
+        if not self.processes:
+            with self._slot():
+                return func(*args)
+        result = self._submit(func, args, self._acquire())
+        return self._result(result, self.timeout)
+
+    def close(self):
+        """
+        Terminates the worker processes, if any.
+        """
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.terminate()
+                # the slots of terminated operations are never freed
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+            self._pool = None
+
+    def _acquire(self):
+        # returns the function freeing the slot taken, bound to the semaphore
+        # it was taken from
+        with self._lock:
+            if self._slots_pid != os.getpid():
+                # slots taken before a fork are never freed in this process
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+                self._slots_pid = os.getpid()
+            slots = self._slots
+        if not slots.acquire(False):
+            raise HashingPoolBusy()
+        return slots.release
+
+    def _acquire_by(self, deadline):
+        # waits for a free slot until `deadline` instead of failing fast
+        while True:
+            try:
+                return self._acquire()
+            except HashingPoolBusy:
+                if time.time() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def _slot(self):
+        release = self._acquire()
+        try:
+            yield
+        finally:
+            release()
+
+    def _submit(self, func, args, release):
+        # queues `func` in the pool, freeing the slot once it completes
+        try:
+            return self._get_pool().apply_async(
+                _call, (func, args), callback=lambda _: release())
+        except Exception:
+            release()
+            raise
+
+    def _result(self, result, timeout):
+        try:
+            succeeded, value = result.get(timeout)
+        except multiprocessing.TimeoutError:
+            raise HashingPoolBusy()
+        if not succeeded:
+            raise value
+        return value
+
+    def _get_pool(self):
+        # the pool is created lazily, and again after a fork, so that every
+        # gunicorn worker gets worker processes of its own
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = multiprocessing.Pool(self.processes)
+                self._pid = os.getpid()
+            return self._pool
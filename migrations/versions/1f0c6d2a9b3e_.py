@@ -0,0 +1,33 @@
+"""add auth_session table
+
+Revision ID: 1f0c6d2a9b3e
+Revises: 4946f05556b0
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1f0c6d2a9b3e'
+down_revision = '4946f05556b0'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table('auth_session',
+    sa.Column('token_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('issued_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('token_id')
+    )
+    op.create_index(op.f('ix_auth_session_user_id'), 'auth_session', ['user_id'], unique=False)
+    op.create_index(op.f('ix_auth_session_expires_at'), 'auth_session', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_auth_session_expires_at'), table_name='auth_session')
+    op.drop_index(op.f('ix_auth_session_user_id'), table_name='auth_session')
+    op.drop_table('auth_session')
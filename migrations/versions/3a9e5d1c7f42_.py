@@ -0,0 +1,28 @@
+"""add per collection versions to user
+
+Revision ID: 3a9e5d1c7f42
+Revises: 8c41e7b05d2f
+Create Date: 2026-10-18 14:21:05.330871
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3a9e5d1c7f42'
+down_revision = '8c41e7b05d2f'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('user', sa.Column('goods_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user', sa.Column('services_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user', sa.Column('accounts_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user', sa.Column('outlets_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('user', 'outlets_version')
+    op.drop_column('user', 'accounts_version')
+    op.drop_column('user', 'services_version')
+    op.drop_column('user', 'goods_version')
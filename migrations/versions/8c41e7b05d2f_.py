@@ -0,0 +1,22 @@
+"""add unique index on user.username
+
+Revision ID: 8c41e7b05d2f
+Revises: 1f0c6d2a9b3e
+Create Date: 2026-10-18 10:02:47.918233
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7b05d2f'
+down_revision = '1f0c6d2a9b3e'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_username'), table_name='user')
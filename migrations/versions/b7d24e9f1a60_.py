@@ -0,0 +1,68 @@
+"""add composite user_id indexes for listing owned rows
+
+Revision ID: b7d24e9f1a60
+Revises: 3a9e5d1c7f42
+Create Date: 2026-10-18 16:40:12.518394
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'b7d24e9f1a60'
+down_revision = '3a9e5d1c7f42'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# columns the models declare but earlier revisions never added; databases
+# built from the migrations alone lack them, so they are added if missing
+MISSING_COLUMNS = {
+    'goods': [
+        sa.Column('price', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+    ],
+    'services': [
+        sa.Column('user_id', sa.Integer(), nullable=True),
+    ],
+    'outlets': [
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=True),
+    ],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, columns in MISSING_COLUMNS.items():
+        existing = set(c['name'] for c in inspector.get_columns(table))
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+                # SQLite cannot add constraints to existing tables
+                if column.name == 'user_id' and bind.dialect.name != 'sqlite':
+                    op.create_foreign_key(
+                        None, table, 'user', ['user_id'], ['user_id'])
+    op.create_index('ix_goods_user_id_id', 'goods', ['user_id', 'id'], unique=False)
+    op.create_index('ix_goods_user_id_price_id', 'goods', ['user_id', 'price', 'id'], unique=False)
+    op.create_index('ix_goods_user_id_name_id', 'goods', ['user_id', 'name', 'id'], unique=False)
+    op.create_index('ix_services_user_id_id', 'services', ['user_id', 'id'], unique=False)
+    op.create_index('ix_services_user_id_price_id', 'services', ['user_id', 'price', 'id'], unique=False)
+    op.create_index('ix_services_user_id_name_id', 'services', ['user_id', 'name', 'id'], unique=False)
+    op.create_index('ix_outlets_user_id_id', 'outlets', ['user_id', 'id'], unique=False)
+    op.create_index('ix_outlets_user_id_name_id', 'outlets', ['user_id', 'name', 'id'], unique=False)
+    op.create_index('ix_accounts_user_id_id', 'accounts', ['user_id', 'id'], unique=False)
+    op.create_index('ix_goods_purchased_user_id_id', 'goods_purchased', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_goods_purchased_user_id_id', table_name='goods_purchased')
+    op.drop_index('ix_accounts_user_id_id', table_name='accounts')
+    op.drop_index('ix_outlets_user_id_name_id', table_name='outlets')
+    op.drop_index('ix_outlets_user_id_id', table_name='outlets')
+    op.drop_index('ix_services_user_id_name_id', table_name='services')
+    op.drop_index('ix_services_user_id_price_id', table_name='services')
+    op.drop_index('ix_services_user_id_id', table_name='services')
+    op.drop_index('ix_goods_user_id_name_id', table_name='goods')
+    op.drop_index('ix_goods_user_id_price_id', table_name='goods')
+    op.drop_index('ix_goods_user_id_id', table_name='goods')
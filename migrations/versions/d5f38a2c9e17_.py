@@ -0,0 +1,38 @@
+"""add auth_revocation table
+
+Revision ID: d5f38a2c9e17
+Revises: b7d24e9f1a60
+Create Date: 2026-10-18 14:02:11.538204
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd5f38a2c9e17'
+down_revision = 'b7d24e9f1a60'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table('auth_revocation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token_id', sa.String(length=32), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_auth_revocation_token_id'), 'auth_revocation', ['token_id'], unique=False)
+    op.create_index(op.f('ix_auth_revocation_expires_at'), 'auth_revocation', ['expires_at'], unique=False)
+    # sessions closed before revocations got a table of their own
+    op.execute(
+        'INSERT INTO auth_revocation (token_id, revoked_at, expires_at) '
+        'SELECT token_id, revoked_at, expires_at FROM auth_session '
+        'WHERE revoked_at IS NOT NULL'
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_auth_revocation_expires_at'), table_name='auth_revocation')
+    op.drop_index(op.f('ix_auth_revocation_token_id'), table_name='auth_revocation')
+    op.drop_table('auth_revocation')
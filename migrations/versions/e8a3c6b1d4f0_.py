@@ -0,0 +1,49 @@
+"""move collection versions off the user table
+
+Revision ID: e8a3c6b1d4f0
+Revises: d5f38a2c9e17
+Create Date: 2026-10-18 18:12:47.204915
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3c6b1d4f0'
+down_revision = 'd5f38a2c9e17'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+COLLECTIONS = ('goods', 'services', 'accounts', 'outlets')
+
+
+def upgrade():
+    op.create_table('collection_version',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('collection', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'collection')
+    )
+    for name in COLLECTIONS:
+        op.execute(
+            "INSERT INTO collection_version (user_id, collection, version) "
+            "SELECT user_id, '{0}', {0}_version FROM \"user\" "
+            "WHERE {0}_version > 0".format(name)
+        )
+    with op.batch_alter_table('user') as batch_op:
+        for name in COLLECTIONS:
+            batch_op.drop_column(name + '_version')
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        for name in COLLECTIONS:
+            batch_op.add_column(sa.Column(name + '_version', sa.Integer(), server_default='0', nullable=False))
+    for name in COLLECTIONS:
+        op.execute(
+            "UPDATE \"user\" SET {0}_version = COALESCE(("
+            "SELECT version FROM collection_version "
+            "WHERE collection_version.user_id = \"user\".user_id "
+            "AND collection = '{0}'), 0)".format(name)
+        )
+    op.drop_table('collection_version')
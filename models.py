@@ -1,16 +1,35 @@
+import time
+import uuid
+
 from flask import current_app
-from passlib.apps import custom_app_context as pwd_context
 from itsdangerous import (
             TimedJSONWebSignatureSerializer as Serializer,
             BadSignature, SignatureExpired
     )
 from flask_script import Manager
+from flask_sqlalchemy import SignallingSession
 from flask_migrate import Migrate, MigrateCommand
+from itertools import chain
+
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.exc import IntegrityError
 
 from app import db, app
+from hashing import HashingPool, calibrate
+from sessions import SessionStore
+from tokens import AuthIdentity, TokenCache, RevocationSet
 
 migrate = Migrate(app, db)
 
+token_cache = TokenCache(
+    app.config.get('AUTH_CACHE_SIZE'), app.config.get('AUTH_CACHE_TTL'))
+revoked_tokens = RevocationSet()
+hashing_pool = HashingPool(
+    app.config.get('HASH_POOL_SIZE'), app.config.get('HASH_POOL_QUEUE'),
+    app.config.get('HASH_POOL_TIMEOUT'),
+    app.config.get('PASSWORD_HASH_ROUNDS'),
+    app.config.get('HASH_POOL_BATCH_TIMEOUT'))
+
 manager = Manager(app)
 manager.add_command('db', MigrateCommand)
 
@@ -18,6 +37,12 @@ manager.add_command('db', MigrateCommand)
 class Outlets(db.Model):
     """ORM for shopping outlets that sell goods and/or services."""
 
+    # serve listing a user's outlets by id and by name from an index
+    __table_args__ = (
+        db.Index('ix_outlets_user_id_id', 'user_id', 'id'),
+        db.Index('ix_outlets_user_id_name_id', 'user_id', 'name', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
     postal_address = db.Column(db.String(100))
@@ -40,6 +65,13 @@ class Outlets(db.Model):
 
 class Goods(db.Model):
     """ORM for purchaseable goods."""
+    # serve listing a user's goods by id, price and name from an index
+    __table_args__ = (
+        db.Index('ix_goods_user_id_id', 'user_id', 'id'),
+        db.Index('ix_goods_user_id_price_id', 'user_id', 'price', 'id'),
+        db.Index('ix_goods_user_id_name_id', 'user_id', 'name', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
     necessary = db.Column(db.Boolean)
@@ -55,6 +87,13 @@ class Goods(db.Model):
 
 class Services(db.Model):
     """ORM for purchaseable services."""
+    # serve listing a user's services by id, price and name from an index
+    __table_args__ = (
+        db.Index('ix_services_user_id_id', 'user_id', 'id'),
+        db.Index('ix_services_user_id_price_id', 'user_id', 'price', 'id'),
+        db.Index('ix_services_user_id_name_id', 'user_id', 'name', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
     price = db.Column(db.Integer)
@@ -68,7 +107,7 @@ class Services(db.Model):
 class User(db.Model):
     """ORM for system users."""
     user_id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(100))
+    username = db.Column(db.String(100), unique=True, index=True)
     password_hash = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=False)
     purchases = db.relationship(
@@ -86,8 +125,10 @@ class User(db.Model):
         """
         Hashes plain text password argument and saves result to instance
         variable.
+        Hashing runs in the hashing pool and raises HashingPoolBusy when the
+        pool is saturated.
         """
-        self.password_hash = pwd_context.encrypt(password)
+        self.password_hash = hashing_pool.encrypt(password)
 
     def verify_password(self, password):
         """
@@ -96,8 +137,25 @@ class User(db.Model):
         Compares the plain text password argument to the hashed password value
         from the database.
         Returns True if comparison matches and False if otherwise.
+        Verification runs in the hashing pool and raises HashingPoolBusy when
+        the pool is saturated.
         """
-        return pwd_context.verify(password, self.password_hash)
+        return hashing_pool.verify(password, self.password_hash)
+
+    def verify_and_update_password(self, password):
+        """
+        Returns True if password is verified and False if otherwise.
+
+        Works like `verify_password` but also re-hashes the password when the
+        stored hash does not follow the configured `PASSWORD_HASH_ROUNDS`
+        policy. The new hash is saved to the instance variable and still
+        needs to be committed.
+        """
+        verified, new_hash = hashing_pool.verify_and_update(
+            password, self.password_hash)
+        if verified and new_hash:
+            self.password_hash = new_hash
+        return verified
 
     def generate_auth_token(self, expiration=600):
         """
@@ -107,37 +165,189 @@ class User(db.Model):
         authentication in this REST API.
         The default expiry time is 600 seconds unless expiry time is explicitly
         specified as the second numerical argument when this method is invoked.
+        Besides the user id, the token carries an active flag, the time the
+        user logged in (`auth_time`) and a unique token id (`jti`) that is
+        used to revoke it on logout. Every token opens a session in the
+        session store.
+        """
+        return User.issue_auth_token(self.user_id, expiration, time.time())
+
+    @staticmethod
+    def issue_auth_token(user_id, expiration, auth_time):
+        """
+        Generates and returns an authentication token for the user of id
+        `user_id` who logged in at `auth_time`.
         """
         s = Serializer(
             current_app.config.get('SECRET_KEY'),
             expires_in=expiration
         )
-        return s.dumps({'id': self.user_id})
+        token_id = uuid.uuid4().hex
+        token = s.dumps({
+            'id': user_id,
+            'active': True,
+            'auth_time': int(auth_time),
+            'jti': token_id
+        })
+        now = time.time()
+        session_store.open(token_id, user_id, now, now + expiration)
+        return token
 
     @staticmethod
-    def verify_auth_token(token):
+    def refresh_auth_token(token, expiration=600):
+        """
+        Returns a fresh authentication token for the valid token argument.
+
+        Only the signature of the token is checked, the user is not loaded
+        and no password is verified. The new token keeps the `auth_time` of
+        the token argument and never outlives `AUTH_MAX_SESSION_LIFETIME`
+        seconds after it. The token argument is revoked, so that only the
+        newest token of a session works and logging out with it ends the
+        session.
+        Returns None if the token is invalid, revoked or its session has
+        reached its maximum lifetime.
         """
-        Verifies validity of the authentication token argument.
+        s = Serializer(current_app.config.get('SECRET_KEY'))
+        try:
+            data, header = s.loads(token, return_header=True)
+        except BadSignature:
+            return None
+
+        if data.get('jti') in revoked_tokens:
+            return None
+        # tokens issued before `auth_time` was introduced start their session
+        # when they were issued
+        auth_time = data.get('auth_time', header.get('iat'))
+        lifetime = current_app.config.get('AUTH_MAX_SESSION_LIFETIME')
+        remaining = int(auth_time + lifetime - time.time())
+        if remaining <= 0:
+            return None
+        new_token = User.issue_auth_token(
+            data.get('id'), min(expiration, remaining), auth_time)
+        token_cache.invalidate(token)
+        if data.get('jti'):
+            session_store.close(data.get('jti'), header.get('exp'))
+        return new_token
 
-        Checks the validity of the authentication token against expiry and
-        forgery.
-        Returns the user authenticated by the token if its valid. Returns None
-        if token is invalid.
+    @staticmethod
+    def authenticate_token(token):
         """
+        Returns the identity of the user authenticated by the token argument.
+
+        Tokens are checked against expiry and forgery, and the identity is a
+        lightweight AuthIdentity rather than a User instance. Verified tokens
+        are cached until they expire so that repeated requests with the same
+        token neither re-verify the signature nor query the database.
+        When `AUTH_STATELESS` is enabled the token claims alone authorize the
+        request and the user is never loaded from the database.
+        Returns None if token is invalid or has been revoked.
+        """
+        identity = token_cache.get(token)
+        if identity:
+            if identity.token_id in revoked_tokens:
+                return None
+            return identity
+
         s = Serializer(current_app.config.get('SECRET_KEY'))
         try:
-            data = s.loads(token)
+            data, header = s.loads(token, return_header=True)
         except SignatureExpired:
             return None
         except BadSignature:
             return None
 
-        user = User.query.get(data.get('id'))
-        return user
+        token_id = data.get('jti')
+        if token_id in revoked_tokens:
+            return None
+        if current_app.config.get('AUTH_STATELESS'):
+            if not data.get('active'):
+                return None
+            identity = AuthIdentity(
+                data.get('id'), True, header.get('iat'), token_id)
+        else:
+            user = User.query.get(data.get('id'))
+            if user is None:
+                return None
+            identity = AuthIdentity(
+                user.user_id, True, header.get('iat'), token_id)
+        token_cache.set(token, identity, header.get('exp'))
+        return identity
+
+    @staticmethod
+    def revoke_auth_token(token):
+        """
+        Revokes the authentication token argument until it expires and closes
+        its session.
+
+        Returns True if the token was valid and has been revoked and False if
+        otherwise.
+        """
+        s = Serializer(current_app.config.get('SECRET_KEY'))
+        try:
+            data, header = s.loads(token, return_header=True)
+        except BadSignature:
+            return False
+
+        token_cache.invalidate(token)
+        if data.get('jti'):
+            session_store.close(data.get('jti'), header.get('exp'))
+        return True
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_tokens(mapper, connection, target):
+    """Drops cached identities of a user whenever the user row changes."""
+    token_cache.invalidate_user(target.user_id)
+
+
+class AuthSession(db.Model):
+    """ORM for authentication sessions, one per issued token."""
+
+    __tablename__ = 'auth_session'
+
+    token_id = db.Column(db.String(32), primary_key=True)
+    # deliberately not a foreign key so that session writes never lock rows
+    # of the user table
+    user_id = db.Column(db.Integer, index=True)
+    issued_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
+    revoked_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        """Defines custom representation for AuthSession model instances."""
+        return '<AuthSession {0}>'.format(self.token_id)
+
+
+class AuthRevocation(db.Model):
+    """ORM for revoked authentication tokens, one per logout or refresh."""
+
+    __tablename__ = 'auth_revocation'
+
+    # rows are only ever inserted, a token revoked twice gets two rows
+    id = db.Column(db.Integer, primary_key=True)
+    token_id = db.Column(db.String(32), index=True)
+    revoked_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
+
+    def __repr__(self):
+        """Defines custom representation for AuthRevocation model instances."""
+        return '<AuthRevocation {0}>'.format(self.token_id)
+
+
+session_store = SessionStore(
+    db, AuthSession.__table__, AuthRevocation.__table__, revoked_tokens,
+    app.config.get('SESSION_FLUSH_SIZE'),
+    app.config.get('SESSION_FLUSH_INTERVAL'),
+    app.config.get('SESSION_SYNC_INTERVAL'))
 
 
 class GoodsPurchased(db.Model):
     """ORM relating goods and services purchased to a user."""
+    __table_args__ = (
+        db.Index('ix_goods_purchased_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'))
     good_id = db.Column(db.Integer, db.ForeignKey('goods.id'))
@@ -153,6 +363,10 @@ class GoodsPurchased(db.Model):
 class Accounts(db.Model):
     """ORM for monetary Accounts."""
 
+    __table_args__ = (
+        db.Index('ix_accounts_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     phone_no = db.Column(db.String(25), nullable=False)
@@ -165,5 +379,120 @@ class Accounts(db.Model):
         return '<Accounts {0}>'.format(self.name)
 
 
+class CollectionVersion(db.Model):
+    """ORM for the versions of the collections of each user."""
+
+    __tablename__ = 'collection_version'
+
+    # deliberately not a foreign key so that bumping a version never locks the
+    # row of the user
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    collection = db.Column(db.String(20), primary_key=True)
+    version = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        """Defines custom representation for CollectionVersion instances."""
+        return '<CollectionVersion {0} {1}>'.format(
+            self.collection, self.version)
+
+
+# models whose rows are versioned per owner, their table name being the name
+# of the collection
+VERSIONED_MODELS = (Goods, Services, Accounts, Outlets)
+
+
+def bump_versions(connection, user_id, *collections):
+    """
+    Increments the version of each of the `collections` of the user of id
+    `user_id`.
+
+    Each collection of each user has a row of its own, created by the first
+    bump, so writes of different users or collections never contend for the
+    same row. ORM changes bump versions on flush. Changes made with bulk
+    statements are not tracked by the session and must bump versions
+    explicitly.
+    """
+    table = CollectionVersion.__table__
+    collections = set(collections)
+    key = and_(
+        table.c.user_id == user_id, table.c.collection.in_(collections))
+    bump = table.update().where(key).values(version=table.c.version + 1)
+    if connection.execute(bump).rowcount == len(collections):
+        return
+    existing = set(row[0] for row in connection.execute(
+        select([table.c.collection]).where(key)))
+    missing = collections - existing
+    rows = [
+        {'user_id': user_id, 'collection': name, 'version': 1}
+        for name in missing
+    ]
+    # SQLite lets a single writer in at a time, so no one else can have
+    # inserted the rows since the UPDATE; pysqlite does not support
+    # savepoints either
+    if connection.dialect.name == 'sqlite':
+        connection.execute(table.insert(), rows)
+        return
+    savepoint = connection.begin_nested()
+    try:
+        connection.execute(table.insert(), rows)
+        savepoint.commit()
+    except IntegrityError:
+        # created by a concurrent transaction in the meantime
+        savepoint.rollback()
+        connection.execute(bump.where(table.c.collection.in_(missing)))
+
+
+def collection_version(user_id, collection):
+    """
+    Returns the current version of the `collection` of the user of id
+    `user_id`, 0 if it never changed.
+    """
+    version = db.session.query(CollectionVersion.version).filter(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection == collection).scalar()
+    return version or 0
+
+
+@event.listens_for(SignallingSession, 'after_flush')
+def bump_flushed_versions(session, flush_context):
+    """
+    Bumps the versions of the collections whose rows were added, changed or
+    deleted by the flush, in the same transaction.
+    """
+    changed = {}
+    dirty = session.dirty
+    for obj in chain(session.new, dirty, session.deleted):
+        if not isinstance(obj, VERSIONED_MODELS):
+            continue
+        owners = set([obj.user_id])
+        if obj in dirty:
+            if not session.is_modified(obj):
+                continue
+            # rows moved to another user change the list of the old owner too
+            owners.update(inspect(obj).attrs.user_id.history.deleted or ())
+        for user_id in owners:
+            if user_id is not None:
+                changed.setdefault(user_id, set()).add(obj.__tablename__)
+    for user_id, collections in changed.items():
+        bump_versions(session.connection(), user_id, *collections)
+
+
+@manager.option(
+    '-t', '--target', dest='target_ms', type=int, default=300,
+    help='Target time in milliseconds to hash one password')
+def calibrate_hashing(target_ms):
+    """Prints the password hash rounds that fit the target hash time."""
+    rounds = calibrate(target_ms)
+    print('PASSWORD_HASH_ROUNDS={0}'.format(rounds))
+
+
+@manager.command
+def prune_sessions():
+    """Deletes authentication sessions and revocations whose token expired."""
+    session_store.flush()
+    print('Pruned {0} expired sessions'.format(session_store.prune()))
+
+
 if __name__ == '__main__':
     manager.run()
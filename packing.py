@@ -0,0 +1,87 @@
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def packb(data):
+    """
+    Returns the MessagePack encoding of `data`.
+
+    The msgpack package is used when it is installed; otherwise `data` is
+    encoded by `_pack`, which covers the types our payloads are made of.
+    Text and byte strings are both encoded as MessagePack strings.
+    """
+    if msgpack is not None:
+        return msgpack.packb(data, use_bin_type=False)
+    parts = []
+    _pack(data, parts.append)
+    return b''.join(parts)
+
+
+def _pack(obj, write):
+    if obj is None:
+        write(b'\xc0')
+    elif obj is True:
+        write(b'\xc3')
+    elif obj is False:
+        write(b'\xc2')
+    elif isinstance(obj, (int, long)):
+        _pack_int(obj, write)
+    elif isinstance(obj, float):
+        write(struct.pack('>Bd', 0xcb, obj))
+    elif isinstance(obj, (unicode, bytes)):
+        if isinstance(obj, unicode):
+            obj = obj.encode('utf-8')
+        _pack_header(len(obj), write, 0xa0, 32, 0xd9, 0xda, 0xdb)
+        write(obj)
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(len(obj), write, 0x90, 16, None, 0xdc, 0xdd)
+        for item in obj:
+            _pack(item, write)
+    elif isinstance(obj, dict):
+        _pack_header(len(obj), write, 0x80, 16, None, 0xde, 0xdf)
+        for key, value in obj.items():
+            _pack(key, write)
+            _pack(value, write)
+    else:
+        raise TypeError('Cannot pack {0!r}'.format(obj))
+
+
+def _pack_int(value, write):
+    if 0 <= value < 0x80:
+        write(struct.pack('B', value))
+    elif -0x20 <= value < 0:
+        write(struct.pack('b', value))
+    elif 0 <= value <= 0xff:
+        write(struct.pack('>BB', 0xcc, value))
+    elif 0 <= value <= 0xffff:
+        write(struct.pack('>BH', 0xcd, value))
+    elif 0 <= value <= 0xffffffff:
+        write(struct.pack('>BI', 0xce, value))
+    elif 0 <= value <= 0xffffffffffffffff:
+        write(struct.pack('>BQ', 0xcf, value))
+    elif -0x80 <= value < 0:
+        write(struct.pack('>Bb', 0xd0, value))
+    elif -0x8000 <= value < 0:
+        write(struct.pack('>Bh', 0xd1, value))
+    elif -0x80000000 <= value < 0:
+        write(struct.pack('>Bi', 0xd2, value))
+    elif -0x8000000000000000 <= value < 0:
+        write(struct.pack('>Bq', 0xd3, value))
+    else:
+        raise OverflowError('Integer {0} is too large to pack'.format(value))
+
+
+def _pack_header(size, write, fix, fix_limit, code8, code16, code32):
+    # writes the type and size header of strings, arrays and maps
+    if size < fix_limit:
+        write(struct.pack('B', fix | size))
+    elif code8 is not None and size <= 0xff:
+        write(struct.pack('>BB', code8, size))
+    elif size <= 0xffff:
+        write(struct.pack('>BH', code16, size))
+    else:
+        write(struct.pack('>BI', code32, size))
@@ -0,0 +1,73 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+class RateLimiter(object):
+    """
+    In-memory token bucket rate limiter.
+
+    Every key gets a bucket of `capacity` tokens that refills at `capacity`
+    tokens per `period` seconds and each hit takes one token. At most
+    `max_keys` buckets are kept; the least recently used bucket is dropped
+    to make room for a new one, so memory stays bounded no matter how many
+    distinct keys are seen.
+    """
+
+    def __init__(self, capacity=10, period=60, max_keys=10000):
+        """
+        Instantiates class instance variables upon object instance creation.
+        """
+        self.capacity = capacity
+        self.period = period
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, *keys):
+        """
+        Takes one token from the bucket of every key.
+
+        Returns 0 if every bucket had a token left. Otherwise no token is
+        taken and the number of seconds to wait before retrying is returned.
+        """
+        return self.take(1, *keys)
+
+    def take(self, cost, *keys):
+        """
+        Takes `cost` tokens from the bucket of every key, like `hit` does for
+        one token.
+        """
+        rate = float(self.capacity) / self.period
+        now = time.time()
+        with self._lock:
+            levels = [self._level(key, rate, now) for key in keys]
+            lowest = min(levels)
+            if lowest < cost:
+                for key, level in zip(keys, levels):
+                    self._buckets[key] = (level, now)
+                return int(math.ceil((cost - lowest) / rate))
+            for key, level in zip(keys, levels):
+                self._buckets[key] = (level - cost, now)
+            return 0
+
+    def clear(self):
+        """
+        Drops every bucket.
+        """
+        with self._lock:
+            self._buckets.clear()
+
+    def _level(self, key, rate, now):
+        # pop the bucket so that storing it again marks it as recently used
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            while len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            return float(self.capacity)
+        level, updated = bucket
+        return min(self.capacity, level + (now - updated) * rate)
@@ -0,0 +1,164 @@
+import time
+from functools import wraps
+
+from flask import g, request
+
+from app import app
+from models import db, User, session_store
+from ratelimit import RateLimiter
+
+login_limiter = RateLimiter(
+    app.config.get('LOGIN_RATE_LIMIT'), app.config.get('LOGIN_RATE_PERIOD'),
+    app.config.get('RATE_LIMIT_MAX_KEYS'))
+bulk_limiter = RateLimiter(
+    app.config.get('BULK_REGISTRATION_RATE_LIMIT'),
+    app.config.get('LOGIN_RATE_PERIOD'), app.config.get('RATE_LIMIT_MAX_KEYS'))
+
+
+def invalid_token_status():
+    """
+    Returns the status of requests with an invalid token to the resource
+    handling the current request, its `invalid_token_status` or 403.
+
+    The resource class is looked up from the endpoint of the request, since
+    the method `authenticate` wraps may itself be a decorator's wrapper.
+    """
+    view = app.view_functions.get(request.endpoint)
+    return getattr(getattr(view, 'view_class', None),
+                   'invalid_token_status', 403)
+
+
+def authenticate(meth):
+    """
+    Resource method decorator that only lets authenticated requests through.
+
+    The caller is resolved once per request from the token in the `username`
+    header and stored in `flask.g.current_user`; the time this took is stored
+    in `flask.g.auth_time` (milliseconds). Requests without a token get a 401
+    while invalid tokens get the `invalid_token_status` of the resource.
+    """
+    @wraps(meth)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('username')
+        if not token:
+            return {'message': 'Unauthenticated request'}, 401
+        if g.get('current_user') is None:
+            start = time.time()
+            g.current_user = User.authenticate_token(token)
+            g.auth_time = (time.time() - start) * 1000
+        if g.current_user is None:
+            return {'message': 'Invalid token'}, invalid_token_status()
+        return meth(*args, **kwargs)
+    return wrapper
+
+
+def admin_only(meth):
+    """
+    Resource method decorator that only lets requests of the users named in
+    the `ADMINS` setting through, the others get a 403.
+
+    It must run after `authenticate`, which resolves the caller.
+    """
+    @wraps(meth)
+    def wrapper(*args, **kwargs):
+        username = db.session.query(User.username).filter(
+            User.user_id == g.current_user.user_id).scalar()
+        if username not in app.config.get('ADMINS'):
+            return {'message': 'Access is restricted to admins'}, 403
+        return meth(*args, **kwargs)
+    return wrapper
+
+
+def client_address():
+    """
+    Returns the address of the client that sent the current request.
+
+    Behind `RATE_LIMIT_PROXY_COUNT` proxies the address is read from the
+    `X-Forwarded-For` entry appended by the outermost proxy, which the client
+    cannot forge.
+    """
+    proxies = app.config.get('RATE_LIMIT_PROXY_COUNT')
+    route = request.access_route
+    if proxies and len(route) >= proxies:
+        return route[-proxies]
+    return request.remote_addr
+
+
+def requested_username():
+    """
+    Returns the username in the body of the request, or None.
+
+    The username is read like `reqparse` reads it for the handlers, from a
+    JSON body first and from the form or query string otherwise, so that
+    attempts are charged to it whichever way it is sent.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and data.get('username') is not None:
+        return u'{0}'.format(data.get('username'))
+    return request.values.get('username')
+
+
+def too_many_attempts(retry_after):
+    """
+    Returns the response sent when a rate limit is exceeded.
+    """
+    return {
+        'message': 'Too many attempts, please try again later'
+    }, 429, {'Retry-After': str(retry_after)}
+
+
+def rate_limited(meth):
+    """
+    Resource method decorator that rejects requests once the username or the
+    client address in them exceeds the login rate limit.
+
+    Rejected requests get a 429 with a `Retry-After` header before any
+    password is hashed.
+    """
+    @wraps(meth)
+    def wrapper(*args, **kwargs):
+        keys = ['addr:{0}'.format(client_address())]
+        username = requested_username()
+        if username:
+            keys.append(u'user:{0}'.format(username))
+        retry_after = login_limiter.hit(*keys)
+        if retry_after:
+            return too_many_attempts(retry_after)
+        return meth(*args, **kwargs)
+    return wrapper
+
+
+@app.after_request
+def add_auth_timing(response):
+    """
+    Reports the time spent authenticating the request in a `Server-Timing`
+    header.
+    """
+    if 'auth_time' in g:
+        response.headers['Server-Timing'] = 'auth;dur={0:.3f}'.format(
+            g.auth_time)
+    return response
+
+
+@app.before_request
+def sync_revocations():
+    """
+    Picks up tokens revoked by other processes once they are due, before the
+    request is authenticated.
+    """
+    try:
+        session_store.sync_if_due()
+    except Exception:
+        app.logger.exception('Failed to sync revoked authentication tokens')
+
+
+@app.teardown_request
+def flush_sessions(exception=None):
+    """
+    Writes batched session changes once they are due, after the request has
+    been handled.
+    """
+    try:
+        session_store.flush_if_due()
+    except Exception:
+        app.logger.exception('Failed to flush authentication sessions')
@@ -0,0 +1,49 @@
+import zlib
+from functools import wraps
+
+from flask import Response, g, request
+
+from models import collection_version
+
+
+def make_etag(collection, user_id, version):
+    """
+    Returns the ETag of the representation requested for version `version`
+    of the `collection` of the user of id `user_id`.
+
+    The request path, query string and `Accept` header are folded into the
+    tag so that every representation of a resource gets a tag of its own.
+    """
+    variant = zlib.crc32(
+        request.full_path.encode('utf-8') + b'|' +
+        request.headers.get('Accept', '').encode('utf-8')) & 0xffffffff
+    return '{0}-{1}-{2}-{3:08x}'.format(collection, user_id, version, variant)
+
+
+def conditional(collection):
+    """
+    Resource method decorator answering conditional GET requests on the
+    `collection` of the current user.
+
+    The strong ETag of a response is derived from the version of the
+    collection, which is bumped whenever any of its rows changes, so a
+    request whose `If-None-Match` holds the current tag gets a 304 without
+    the collection being queried or serialized. Must run after
+    `authenticate`.
+    """
+    def decorator(meth):
+        @wraps(meth)
+        def wrapper(*args, **kwargs):
+            user_id = g.current_user.user_id
+            version = collection_version(user_id, collection)
+            etag = make_etag(collection, user_id, version)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            response = meth(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
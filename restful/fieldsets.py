@@ -0,0 +1,63 @@
+from functools import wraps
+
+from flask import g, request
+from sqlalchemy.orm import load_only
+
+from serializer import schema_columns
+
+
+def sparse_fieldset(schema_class):
+    """
+    Resource method decorator restricting responses to the fields named in
+    the comma separated `fields` query string argument.
+
+    The names are validated against the fields of `schema_class` and stored
+    in `flask.g.fields`, where the renderers and `fieldset_columns` and
+    `fieldset_options` pick them up. Requests naming unknown fields get a
+    400.
+    """
+    def decorator(meth):
+        @wraps(meth)
+        def wrapper(*args, **kwargs):
+            g.fields = None
+            value = request.args.get('fields')
+            if value is not None:
+                names = [name.strip() for name in value.split(',')]
+                names = frozenset(name for name in names if name)
+                if not names:
+                    return {'message': 'No fields requested'}, 400
+                unknown = names - set(schema_class().fields)
+                if unknown:
+                    return {
+                        'message': 'Unknown fields: {0}'.format(
+                            ', '.join(sorted(unknown)))
+                    }, 400
+                g.fields = names
+            return meth(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def requested_fields():
+    """
+    Returns the names of the fields requested, or None for all fields.
+    """
+    return g.get('fields')
+
+
+def fieldset_columns(model, schema_class):
+    """
+    Returns the columns of `model` to select for the requested fields.
+    """
+    return schema_columns(model, schema_class, only=requested_fields())
+
+
+def fieldset_options(model, schema_class):
+    """
+    Returns query options loading only the columns of `model` needed for the
+    requested fields and for checking its owner.
+    """
+    if requested_fields() is None:
+        return []
+    columns = fieldset_columns(model, schema_class) + [model.user_id]
+    return [load_only(*columns)]
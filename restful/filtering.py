@@ -0,0 +1,81 @@
+from flask import request
+
+
+class InvalidFilter(Exception):
+    """Raised when the filter or sort arguments of a request are invalid."""
+
+
+def _integer(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidFilter('{0} must be an integer'.format(name))
+
+
+def _boolean(name, value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise InvalidFilter('{0} must be true or false'.format(name))
+
+
+def _prefix(name, value):
+    # escape LIKE wildcards so that the prefix matches literally
+    for char in ('\\', '%', '_'):
+        value = value.replace(char, '\\' + char)
+    return value + '%'
+
+
+# query string arguments resources may whitelist, mapped to the function
+# parsing their value and the predicate they filter on
+FILTERS = {
+    'price_min': (_integer, lambda model, value: model.price >= value),
+    'price_max': (_integer, lambda model, value: model.price <= value),
+    'necessary': (_boolean, lambda model, value: model.necessary == value),
+    'name_prefix': (
+        _prefix, lambda model, value: model.name.like(value, escape='\\')),
+}
+
+
+# query string arguments of list routes other than filters
+LIST_ARGUMENTS = frozenset([
+    'cursor', 'fields', 'ids', 'page_size', 'paginate', 'sort', 'stream'
+])
+
+
+def filter_and_sort(query, model, filters=(), sorts=()):
+    """
+    Applies the filters and sort order requested to `query` on `model`.
+
+    Only the `filters` (names from FILTERS) and `sorts` (column names) a
+    resource whitelists are honoured, so that requests cannot filter or sort
+    on columns without an index. `?sort=` takes `id` or a column name,
+    prefixed with `-` for a descending order. Returns the filtered query and
+    the keys, a list of `(column, descending)` pairs ending with the id, to
+    paginate on. Raises InvalidFilter if an argument is unknown, a value is
+    invalid or the sort is not allowed.
+    """
+    unknown = set(request.args) - LIST_ARGUMENTS - set(filters)
+    if unknown:
+        raise InvalidFilter('Unknown filters: {0}'.format(
+            ', '.join(sorted(unknown))))
+    for name in filters:
+        value = request.args.get(name)
+        if value is None or value == '':
+            continue
+        parse, predicate = FILTERS[name]
+        query = query.filter(predicate(model, parse(name, value)))
+
+    sort = request.args.get('sort')
+    if not sort:
+        return query, [(model.id, False)]
+    descending = sort.startswith('-')
+    name = sort[1:] if descending else sort
+    if name == 'id':
+        return query, [(model.id, descending)]
+    if name not in sorts:
+        raise InvalidFilter('Results can only be sorted by {0}'.format(
+            ', '.join(('id',) + tuple(sorts))))
+    # the id breaks ties, in the same direction so that one index serves both
+    return query, [(getattr(model, name), descending), (model.id, descending)]
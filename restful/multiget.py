@@ -0,0 +1,39 @@
+from flask import request
+
+from app import app
+
+
+class InvalidIds(Exception):
+    """Raised when the `ids` query string argument of a request is invalid."""
+
+
+def requested_ids():
+    """
+    Returns the ids named in the comma separated `ids` query string argument
+    of the request, in order and without duplicates, or None if there is no
+    such argument.
+
+    Raises InvalidIds if an id is not an integer, if no id is given or if
+    more than `MAX_MULTI_GET_IDS` ids are given, which keeps the `IN` list of
+    the lookup bounded.
+    """
+    value = request.args.get('ids')
+    if value is None:
+        return None
+    ids = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            row_id = int(name)
+        except ValueError:
+            raise InvalidIds('ids must be integers')
+        if row_id not in ids:
+            ids.append(row_id)
+    if not ids:
+        raise InvalidIds('No ids requested')
+    limit = app.config.get('MAX_MULTI_GET_IDS')
+    if len(ids) > limit:
+        raise InvalidIds('At most {0} ids may be requested'.format(limit))
+    return ids
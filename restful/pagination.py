@@ -0,0 +1,158 @@
+from flask import request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, false, or_
+from werkzeug.urls import url_encode
+
+from app import app, db
+
+
+class InvalidPage(Exception):
+    """Raised when the pagination arguments of a request are invalid."""
+
+
+def _serializer():
+    return URLSafeSerializer(app.config.get('SECRET_KEY'), salt='cursor')
+
+
+def _signature(keys):
+    return [
+        ('-' if descending else '') + column.key
+        for column, descending in keys
+    ]
+
+
+def encode_cursor(keys, row):
+    """
+    Returns an opaque cursor pointing past `row` in the order of `keys`.
+    """
+    values = [getattr(row, column.key) for column, _ in keys]
+    return _serializer().dumps({'k': _signature(keys), 'v': values})
+
+
+def decode_cursor(keys, cursor):
+    """
+    Returns the values of `keys` of the row the `cursor` points past.
+
+    Raises InvalidPage if the cursor was not issued by this app or was
+    issued for another order.
+    """
+    try:
+        data = _serializer().loads(cursor)
+    except BadSignature:
+        raise InvalidPage('Invalid cursor')
+    if not isinstance(data, dict) or data.get('k') != _signature(keys):
+        raise InvalidPage('Cursor does not match the sort order')
+    return data.get('v')
+
+
+def ordering(keys):
+    """
+    Returns the ORDER BY clauses of `keys`, a list of `(column, descending)`
+    pairs.
+    """
+    return [
+        column.desc() if descending else column.asc()
+        for column, descending in keys
+    ]
+
+
+def _nulls_first():
+    # whether the backend sorts NULLs before every value in ascending order
+    dialect = db.session.get_bind().dialect.name
+    return dialect not in ('postgresql', 'oracle')
+
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _beyond(column, value, descending, nulls_first):
+    # the values of `column` that sort after `value`, NULLs included
+    nulls_last = nulls_first == descending
+    if value is None:
+        return false() if nulls_last else column.isnot(None)
+    beyond = column < value if descending else column > value
+    if nulls_last and getattr(column, 'nullable', False):
+        beyond = or_(beyond, column.is_(None))
+    return beyond
+
+
+def after(keys, values):
+    """
+    Returns the predicate selecting the rows that come after the row whose
+    `keys` are `values`, i.e. `(a, b) > (x, y)` spelled out so that every
+    backend can match it against an index.
+
+    NULL values sort where the backend puts them, before every other value
+    in ascending order on SQLite and MySQL and after them on PostgreSQL.
+    """
+    nulls_first = _nulls_first()
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [_equal(c, v) for (c, _), v in zip(keys[:i], values[:i])]
+        beyond = _beyond(column, values[i], descending, nulls_first)
+        clauses.append(and_(*(equal + [beyond])))
+    return or_(*clauses)
+
+
+def wants_pages():
+    """
+    Returns False if the request opted out of pagination with
+    `?paginate=false` and True if otherwise.
+    """
+    value = request.args.get('paginate', '')
+    return value.lower() not in ('0', 'false', 'no')
+
+
+def page_size():
+    """
+    Returns the page size requested with `?page_size=`, `PAGE_SIZE` by
+    default.
+
+    Raises InvalidPage unless the size is between 1 and `MAX_PAGE_SIZE`.
+    """
+    limit = app.config.get('MAX_PAGE_SIZE')
+    try:
+        size = int(request.args.get('page_size', app.config.get('PAGE_SIZE')))
+    except ValueError:
+        size = 0
+    if not 0 < size <= limit:
+        raise InvalidPage(
+            'Page size must be between 1 and {0}'.format(limit))
+    return size
+
+
+def paginate(query, keys):
+    """
+    Returns the requested page of the rows of `query` and the cursor of the
+    page that follows, or None on the last page.
+
+    Rows are ordered by `keys`, a list of `(column, descending)` pairs whose
+    values are unique together, and a page starts right after
+    the keys of the cursor, so every page costs one indexed range scan no
+    matter how deep it is. One row more than the page size is read to tell
+    whether another page follows, without counting rows.
+    """
+    size = page_size()
+    selected = [d['expr'] for d in query.column_descriptions]
+    for column, _ in keys:
+        if not any(expr is column for expr in selected):
+            query = query.add_columns(column)
+    cursor = request.args.get('cursor')
+    if cursor:
+        values = decode_cursor(keys, cursor)
+        query = query.filter(after(keys, values))
+    rows = query.order_by(*ordering(keys)).limit(size + 1).all()
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    return rows, encode_cursor(keys, rows[-1])
+
+
+def next_link(cursor):
+    """
+    Returns the `Link` header value pointing to the page of `cursor`.
+    """
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return '<{0}?{1}>; rel="next"'.format(request.base_url, url_encode(args))
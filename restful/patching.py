@@ -0,0 +1,88 @@
+from flask import request
+
+
+class InvalidPatch(Exception):
+    """Raised when the body of a PATCH request is invalid."""
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, basestring):
+        if value.lower() in ('1', 'true', 'yes'):
+            return True
+        if value.lower() in ('0', 'false', 'no'):
+            return False
+    raise ValueError(value)
+
+
+def _integer(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return int(value)
+
+
+def _text(value):
+    if not isinstance(value, basestring):
+        raise ValueError(value)
+    return value
+
+
+def _converter(column):
+    python_type = column.type.python_type
+    if python_type is bool:
+        return _boolean, 'true or false'
+    if python_type in (int, long):
+        return _integer, 'an integer'
+    return _text, 'a string'
+
+
+def patch_values(model, schema_class):
+    """
+    Returns the column values to set on a row of `model` for the fields sent
+    in the JSON or form body of a PATCH request.
+
+    Only the fields present in the body are returned, so fields that are
+    left out keep their value. Fields must be fields of `schema_class` other
+    than `id` and their values are converted to the type of their column.
+    Raises InvalidPatch if the body is empty or holds unknown fields or
+    invalid values.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = request.form.to_dict()
+    if not data:
+        raise InvalidPatch('No fields to update')
+    writable = set(schema_class().fields) - set(['id'])
+    unknown = set(data) - writable
+    if unknown:
+        raise InvalidPatch('Fields cannot be updated: {0}'.format(
+            ', '.join(sorted(unknown))))
+    values = {}
+    for name, value in data.items():
+        convert, expected = _converter(getattr(model, name))
+        try:
+            values[name] = convert(value)
+        except (TypeError, ValueError):
+            raise InvalidPatch('{0} must be {1}'.format(name, expected))
+    return values
+
+
+def prefers_minimal():
+    """
+    Returns True if the `Prefer` header of the request asks for
+    `return=minimal`, i.e. for no representation in the response.
+    """
+    preferences = request.headers.get('Prefer', '')
+    return any(
+        preference.split(';')[0].strip().lower() == 'return=minimal'
+        for preference in preferences.split(',')
+    )
+
+
+def minimal_response():
+    """
+    Returns the empty response of a request that preferred
+    `return=minimal`.
+    """
+    return '', 204, {'Preference-Applied': 'return=minimal'}
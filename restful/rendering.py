@@ -0,0 +1,202 @@
+import csv
+import io
+import json
+
+from flask import Response, make_response, request, stream_with_context
+
+from app import app
+from packing import packb
+from restful.fieldsets import requested_fields
+from restful.pagination import (
+    InvalidPage, next_link, ordering, paginate, wants_pages
+)
+from restful.representations import dumps
+from serializer import compile_schema
+
+
+def render(schema, obj, status=200, many=False, as_string=False):
+    """
+    Returns a JSON response of `obj` serialized like the marshmallow `schema`.
+
+    Objects are dumped by the compiled version of the schema, restricted to
+    the fields requested with `?fields=`, and the payload is encoded once,
+    straight from the objects, rather than being dumped, parsed back and then
+    encoded again by Flask-RESTful.
+    With `as_string` the payload is a JSON string holding the JSON document,
+    the wire format routes that returned `schema.dumps(...).data` have always
+    had.
+    """
+    dump = compile_schema(type(schema), requested_fields())
+    if many:
+        data = [dump(item) for item in obj]
+    else:
+        data = dump(obj)
+    if as_string:
+        data = json.dumps(data)
+    response = make_response(dumps(data) + '\n', status)
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def render_many(schema, rows, statuses):
+    """
+    Returns a JSON response mapping each looked up id to its HTTP `status`
+    and, for the rows in `rows`, to the row serialized like the marshmallow
+    `schema` under `data`.
+
+    `rows` and `statuses` are keyed by id, see `dal.lookup_many`.
+    """
+    dump = compile_schema(type(schema), requested_fields())
+    data = {}
+    for row_id, status in statuses.items():
+        data[str(row_id)] = {'status': status}
+        if row_id in rows:
+            data[str(row_id)]['data'] = dump(rows[row_id])
+    response = make_response(dumps(data) + '\n', 200)
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def wants_stream():
+    """
+    Returns True if the list requested should be streamed.
+
+    The `stream` query string argument of the request takes precedence over
+    the `STREAM_LISTS` setting.
+    """
+    value = request.args.get('stream')
+    if value is None:
+        return app.config.get('STREAM_LISTS')
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _iterate(rows, batch_size):
+    # queries are read from a server-side cursor, pages are already in memory
+    if hasattr(rows, 'yield_per'):
+        return rows.yield_per(batch_size)
+    return rows
+
+
+def stream(schema, query, status=200):
+    """
+    Returns a JSON array response of the rows of `query` that is written out
+    while the rows are being read.
+
+    Rows of a query are fetched `STREAM_BATCH_SIZE` at a time from a
+    server-side cursor and each batch is encoded and sent before the next one
+    is read, so memory use does not grow with the number of rows. `query`
+    may also be a list of rows, such as a page.
+    """
+    dump = compile_schema(type(schema), requested_fields())
+    batch_size = app.config.get('STREAM_BATCH_SIZE')
+
+    def generate():
+        yield '['
+        batch = []
+        separator = ''
+        for item in _iterate(query, batch_size):
+            batch.append(dumps(dump(item)))
+            if len(batch) == batch_size:
+                yield separator + ','.join(batch)
+                separator = ','
+                batch = []
+        if batch:
+            yield separator + ','.join(batch)
+        yield ']\n'
+
+    return Response(stream_with_context(generate()), status,
+                    mimetype='application/json')
+
+
+def render_msgpack(schema, query, status=200,
+                   media_type='application/x-msgpack'):
+    """
+    Returns a MessagePack array response of the rows of `query`.
+    """
+    dump = compile_schema(type(schema), requested_fields())
+    response = make_response(packb([dump(item) for item in query]), status)
+    response.headers['Content-Type'] = media_type
+    return response
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def stream_csv(schema, query, status=200):
+    """
+    Returns a CSV response of the rows of `query` that is written out while
+    the rows are being read, `STREAM_BATCH_SIZE` rows at a time.
+
+    The first line holds the names of the fields dumped, in alphabetical
+    order.
+    """
+    dump = compile_schema(type(schema), requested_fields())
+    names = sorted(requested_fields() or type(schema)().fields)
+    batch_size = app.config.get('STREAM_BATCH_SIZE')
+
+    def generate():
+        buffer = io.BytesIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for count, item in enumerate(_iterate(query, batch_size), 1):
+            row = dump(item)
+            writer.writerow([_csv_value(row.get(name)) for name in names])
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), status,
+                    mimetype='text/csv')
+
+
+# media types list endpoints can respond with, the default one first
+LIST_MEDIA_TYPES = (
+    'application/json', 'application/x-msgpack', 'application/msgpack',
+    'text/csv'
+)
+
+
+def render_list(schema, query, keys, as_string=False):
+    """
+    Returns a response of a page of the rows of `query` in the media type the
+    `Accept` header of the request prefers, JSON by default.
+
+    Rows are ordered and paginated by `keys`, a list of `(column,
+    descending)` pairs, see `paginate`, and a `Link` header points to the
+    next page, if any. Requests must opt out with `?paginate=false` to get
+    every row at once. JSON arrays are streamed if
+    the request asks for it, see `wants_stream`, and CSV is always streamed.
+    JSON payloads are JSON strings with `as_string`, see `render`, and are
+    never streamed then.
+    """
+    cursor = None
+    if wants_pages():
+        try:
+            query, cursor = paginate(query, keys)
+        except InvalidPage as e:
+            return {'message': str(e)}, 400
+    else:
+        query = query.order_by(*ordering(keys))
+    media_type = request.accept_mimetypes.best_match(
+        LIST_MEDIA_TYPES, LIST_MEDIA_TYPES[0])
+    if media_type == 'text/csv':
+        response = stream_csv(schema, query)
+    elif media_type != 'application/json':
+        response = render_msgpack(schema, query, media_type=media_type)
+    elif as_string:
+        response = render(schema, query, many=True, as_string=True)
+    elif wants_stream():
+        response = stream(schema, query)
+    else:
+        response = render(schema, query, many=True)
+    response.headers['Vary'] = 'Accept'
+    if cursor:
+        response.headers['Link'] = next_link(cursor)
+    return response
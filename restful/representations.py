@@ -0,0 +1,59 @@
+import importlib
+from functools import partial
+
+from flask import make_response
+
+from app import app
+
+# JSON modules tried, fastest first, when JSON_ENCODER is `auto`
+ENCODERS = ('ujson', 'simplejson', 'json')
+
+# modules that cannot add whitespace between items, only picked by `auto` in
+# compact mode
+COMPACT_ENCODERS = ('ujson',)
+
+
+def get_encoder(name='auto', compact=False):
+    """
+    Returns the JSON module called `name`, or the fastest installed one when
+    `name` is `auto`. Outside of compact mode `auto` skips the modules that
+    always encode compactly. The stdlib `json` module is always available.
+    """
+    if name != 'auto':
+        return importlib.import_module(name)
+    for candidate in ENCODERS:
+        if candidate in COMPACT_ENCODERS and not compact:
+            continue
+        try:
+            return importlib.import_module(candidate)
+        except ImportError:
+            continue
+
+
+def make_dumps(name='auto', compact=False):
+    """
+    Returns a function encoding data to JSON with the module `name`.
+
+    In compact mode items are separated without whitespace. ujson never adds
+    whitespace, so its output is compact either way; it is told not to
+    escape forward slashes, which the other modules leave alone too.
+    """
+    module = get_encoder(name, compact)
+    if module.__name__ == 'ujson':
+        return partial(module.dumps, escape_forward_slashes=False)
+    separators = (',', ':') if compact else None
+    return partial(module.dumps, separators=separators)
+
+
+dumps = make_dumps(
+    app.config.get('JSON_ENCODER'), app.config.get('JSON_COMPACT'))
+
+
+def output_json(data, code, headers=None):
+    """
+    Makes a Flask response with a JSON encoded body, using the encoder picked
+    by the JSON_ENCODER and JSON_COMPACT settings.
+    """
+    response = make_response(dumps(data) + '\n', code)
+    response.headers.extend(headers or {})
+    return response
@@ -1,13 +1,43 @@
 import json
 
-from flask import request
+from flask import g, request
 from flask_restful import Resource, Api, reqparse
+from sqlalchemy.exc import IntegrityError
 
 from app import app, db
-from models import User, Accounts, Outlets, Goods, Services
-from serializer import ServicesSchema, AccountsSchema, OutletSchema, GoodsSchema
+from dal import delete_owned, lookup, lookup_many, probe, update_owned
+from hashing import HashingPoolBusy
+from models import User, Accounts, Outlets, Goods, Services, hashing_pool
+from restful.auth import (
+    admin_only, authenticate, bulk_limiter, client_address, rate_limited,
+    too_many_attempts
+)
+from restful.caching import conditional
+from restful.fieldsets import (
+    sparse_fieldset, fieldset_columns, fieldset_options
+)
+from restful.filtering import InvalidFilter, filter_and_sort
+from restful.multiget import InvalidIds, requested_ids
+from restful.patching import (
+    InvalidPatch, minimal_response, patch_values, prefers_minimal
+)
+from restful.rendering import render, render_list, render_many
+from restful.representations import output_json
+from serializer import (
+    ServicesSchema, AccountsSchema, OutletSchema, GoodsSchema, schema_columns
+)
 
 api = Api(app)
+api.representation('application/json')(output_json)
+
+
+def server_busy():
+    """
+    Returns the response sent when password hashing capacity is exhausted.
+    """
+    return {
+        'message': 'Server is busy, please try again later'
+    }, 503, {'Retry-After': '1'}
 
 
 class UserResource(Resource):
@@ -15,6 +45,7 @@ class UserResource(Resource):
     Class encapsulates the restful implementation of the User resource.
     """
 
+    @rate_limited
     def post(self):
         """
         Creates a new user when the `/auth/new` url is requested using a POST
@@ -27,14 +58,18 @@ class UserResource(Resource):
 
         if values.get('username'):
             if values.get('password'):
-                # check if a user by provided username already s
-                exists = User.query.filter_by(username=values.get('username')).first()
-                if exists:
-                    return json.dumps({'message': 'User already exists'}), 400
                 user = User(username=values.get('username'))
-                user.hash_password(values.get('password'))
+                try:
+                    user.hash_password(values.get('password'))
+                except HashingPoolBusy:
+                    return server_busy()
                 db.session.add(user)
-                db.session.commit()
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # the unique index on username rejected the insert
+                    db.session.rollback()
+                    return json.dumps({'message': 'User already exists'}), 400
                 return json.dumps(
                                 {'message': 'User successfully registered'}
                     ), 201
@@ -42,6 +77,126 @@ class UserResource(Resource):
         return json.dumps({'message': 'Username missing'}), 400
 
 
+class BulkUserResource(Resource):
+    """
+    Class encapsulates the restful implementation of bulk User registration.
+    """
+
+    method_decorators = [admin_only, authenticate]
+
+    def post(self):
+        """
+        Creates many users when the `/auth/bulk/` url is requested by an admin
+        using a POST http method with a JSON list of `username` and
+        `password` pairs.
+
+        Every user counts against the bulk registration rate limit of both
+        the admin and the client address. Passwords are hashed in parallel
+        across the hashing pool and all new users are inserted in a single
+        transaction. The response lists the outcome for every pair in the
+        order they were sent.
+        """
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('users')
+        if not isinstance(data, list) or not data:
+            return {'message': 'A list of users is required'}, 400
+        limit = min(
+            app.config.get('BULK_REGISTRATION_MAX'), bulk_limiter.capacity)
+        if len(data) > limit:
+            return {
+                'message': 'At most {0} users may be registered at once'.format(
+                    limit)
+            }, 400
+        retry_after = bulk_limiter.take(
+            len(data), 'addr:{0}'.format(client_address()),
+            'user:{0}'.format(g.current_user.user_id))
+        if retry_after:
+            return too_many_attempts(retry_after)
+
+        results = []
+        new_users = {}
+        for item in data:
+            item = item if isinstance(item, dict) else {}
+            username = item.get('username')
+            result = {'username': username, 'status': 400}
+            password = item.get('password')
+            if not username:
+                result['message'] = 'Username missing'
+            elif not isinstance(username, basestring):
+                result['message'] = 'Username must be a string'
+            elif not password:
+                result['message'] = 'Password missing'
+            elif not isinstance(password, basestring):
+                result['message'] = 'Password must be a string'
+            elif username in new_users:
+                result['message'] = 'Duplicate username in request'
+            else:
+                result.update(
+                    status=201, message='User successfully registered')
+                new_users[username] = password
+            results.append(result)
+
+        rejected = self.insert(new_users)
+        if rejected is None:
+            return server_busy()
+        for result in results:
+            if result['status'] == 201 and result['username'] in rejected:
+                result.update(status=400, message='User already exists')
+        created = len([r for r in results if r['status'] == 201])
+        return {'created': created, 'results': results}, 200
+
+    def insert(self, new_users):
+        """
+        Inserts the users in the `new_users` username to password mapping that
+        do not exist yet in one transaction.
+
+        Returns the set of usernames that already existed, or None if the
+        hashing pool is saturated.
+        """
+        existing = self.existing_usernames(new_users)
+        usernames = [u for u in new_users if u not in existing]
+        try:
+            hashes = hashing_pool.encrypt_many(
+                [new_users[u] for u in usernames])
+        except HashingPoolBusy:
+            return None
+        rows = [
+            {'username': username, 'password_hash': password_hash}
+            for username, password_hash in zip(usernames, hashes)
+        ]
+        while rows:
+            try:
+                db.session.execute(User.__table__.insert(), rows)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # some usernames were registered concurrently, skip them and
+                # try again with the rest
+                db.session.rollback()
+                existing |= self.existing_usernames(new_users)
+                remaining = [r for r in rows if r['username'] not in existing]
+                if len(remaining) == len(rows):
+                    raise
+                rows = remaining
+        return existing
+
+    @staticmethod
+    def existing_usernames(usernames, chunk_size=500):
+        """
+        Returns the set of `usernames` that belong to existing users.
+        """
+        usernames = list(usernames)
+        existing = set()
+        # keep the IN lists within the bound parameter limits of every backend
+        for start in range(0, len(usernames), chunk_size):
+            chunk = usernames[start:start + chunk_size]
+            rows = db.session.query(User.username).filter(
+                User.username.in_(chunk))
+            existing.update(row.username for row in rows)
+        return existing
+
+
 class LoginResource(Resource):
     """
     Class encapsulates logic involving the authorization processes.
@@ -52,14 +207,13 @@ class LoginResource(Resource):
         Logs out the currently logged in user when the url `/auth/logout/` is
         requested with a get http method.
         """
-        user = User.verify_auth_token(request.headers.get('username'))
-        if user:
-            user.is_active = False
-            db.session.add(user)
-            db.session.commit()
+        token = request.headers.get('username')
+        if token and User.authenticate_token(token):
+            User.revoke_auth_token(token)
             return json.dumps({'message': 'User successfully logged out'}), 200
         return json.dumps({'message': 'User is not logged in'}), 400
 
+    @rate_limited
     def post(self):
         """
         Returns an authentication token when a valid `username` and `password`
@@ -76,12 +230,17 @@ class LoginResource(Resource):
             user = User.query.filter_by(username=values.get('username')).first()
             if user:
                 if values.get('password'):
-                    if user.verify_password(values.get('password')):
+                    try:
+                        verified = user.verify_and_update_password(
+                            values.get('password'))
+                    except HashingPoolBusy:
+                        return server_busy()
+                    if verified:
                         token = user.generate_auth_token()
                         decoded = token.decode('ascii')
-                        user.is_active = True
-                        db.session.add(user)
-                        db.session.commit()
+                        if db.session.is_modified(user):
+                            # the password was re-hashed under a new policy
+                            db.session.commit()
                         return {'token': decoded}, 200
                     return json.dumps({'message': 'Incorrect password'}), 400
                 return json.dumps(
@@ -91,58 +250,86 @@ class LoginResource(Resource):
         return json.dumps({'message': 'Username is required'}), 400
 
 
+class RefreshResource(Resource):
+    """
+    Class encapsulates the restful implementation of token refreshing.
+    """
+
+    def post(self):
+        """
+        Returns a fresh authentication token in exchange for a valid one when
+        the url `/auth/refresh/` is requested with a post http method.
+
+        Unlike logging in, refreshing does not verify a password, so long
+        lived clients can keep their session going cheaply until it reaches
+        its maximum lifetime.
+        """
+        token = request.headers.get('username')
+        if not token:
+            return {'message': 'Unauthenticated request'}, 401
+        new_token = User.refresh_auth_token(token)
+        if new_token:
+            return {'token': new_token.decode('ascii')}, 200
+        return {'message': 'Invalid or expired token'}, 403
+
+
 class AccountListResource(Resource):
 
+    method_decorators = [authenticate]
+
     def __init__(self):
         """
         Instantiates class instance variables upon object instance creation.
         """
         self.accounts_schema = AccountsSchema()
 
+    @conditional('accounts')
+    @sparse_fieldset(AccountsSchema)
     def get(self):
         """
         List all accounts belonging to the currently logged in user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                all_accounts = Accounts.query.filter_by(
-                    user_id=current_user.user_id
-                )
-                result = self.accounts_schema.dumps(all_accounts, many=True)
-                result_dict = json.loads(result.data)
-                return result_dict, 200
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        try:
+            ids = requested_ids()
+        except InvalidIds as e:
+            return {'message': str(e)}, 400
+        if ids is not None:
+            # `?ids=` fetches the rows of those ids by one query instead
+            return render_many(self.accounts_schema, *lookup_many(
+                Accounts, ids, current_user.user_id,
+                *fieldset_columns(Accounts, AccountsSchema)))
+        all_accounts = db.session.query(
+            *fieldset_columns(Accounts, AccountsSchema)
+        ).filter(Accounts.user_id == current_user.user_id)
+        try:
+            all_accounts, keys = filter_and_sort(all_accounts, Accounts)
+        except InvalidFilter as e:
+            return {'message': str(e)}, 400
+        return render_list(self.accounts_schema, all_accounts, keys)
 
     def post(self):
         """
         Create a new Account where the owner will be the currently logged in
         user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('phone_no')
-                parser.add_argument('account_no')
-                parser.add_argument('account_provider')
-                values = parser.parse_args()
-                if None not in values.values() and '' not in values.values():
-                    account = Accounts(**values)
-                    account.user_id = current_user.user_id
-                    db.session.add(account)
-                    db.session.commit()
-                    return {'message': 'Account created'}, 201
-                return {
-                        'message': 'Account name, phone no, account no\
-                        and account provider are all required'
-                        }, 400
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('phone_no')
+        parser.add_argument('account_no')
+        parser.add_argument('account_provider')
+        values = parser.parse_args()
+        if None not in values.values() and '' not in values.values():
+            account = Accounts(**values)
+            account.user_id = current_user.user_id
+            db.session.add(account)
+            db.session.commit()
+            return {'message': 'Account created'}, 201
+        return {
+                'message': 'Account name, phone no, account no\
+                and account provider are all required'
+                }, 400
 
 
 class AccountDetailResource(Resource):
@@ -150,80 +337,98 @@ class AccountDetailResource(Resource):
     Class encapsulates restful implementation of the Accounts detail routes.
     """
 
+    method_decorators = [authenticate]
+
     def __init__(self):
         """
         Instantiates class instance variables upon object instance creation.
         """
         self.accounts_schema = AccountsSchema()
 
+    @conditional('accounts')
+    @sparse_fieldset(AccountsSchema)
     def get(self, account_id):
         """
         Returns details of Account whose id is `account_id`.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                ac = Accounts.query.get(account_id)
-                if ac:
-                    if ac.user_id == current_user.user_id:
-                        result = self.accounts_schema.dumps(ac)
-                        result_dict = json.loads(result.data)
-                        return result_dict, 200
-                    return {
-                            'message': 'Access to account is restricted to owner'
-                        }, 403
-                return {'message': 'Account does not exist'}, 404
-            return {'message': 'Invalid token'}, 400
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        ac, status = lookup(
+            Accounts, account_id, current_user.user_id,
+            *fieldset_options(Accounts, AccountsSchema))
+        if ac:
+            return render(self.accounts_schema, ac)
+        if status == 403:
+            return {
+                    'message': 'Access to account is restricted to owner'
+                }, 403
+        return {'message': 'Account does not exist'}, 404
 
     def put(self, account_id):
         """
         Updates account of id `account_id` with user provided data.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                ac = Accounts.query.get(account_id)
-                if ac:
-                    if ac.user_id == current_user.user_id:
-                        if 'phone_no' in request.form and 'name' in request.form:
-                            ac.phone_no = request.form.get('phone_no')
-                            ac.name = request.form.get('name')
-                            db.session.add(ac)
-                            db.session.commit()
-                            result = self.accounts_schema.dumps(ac)
-                            result_dict = json.loads(result.data)
-                            return result_dict, 200
-                        return {'message': 'Missing parameter data'}, 400
-                    return {
-                            'message': 'Access to account is restricted to owner'
-                        }, 403
-                return {'message': 'Account does not exist'}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        if 'phone_no' in request.form and 'name' in request.form:
+            values = {
+                'phone_no': request.form.get('phone_no'),
+                'name': request.form.get('name')
+            }
+            ac, status = update_owned(
+                Accounts, account_id, current_user.user_id, values,
+                schema_columns(Accounts, AccountsSchema))
+            if ac:
+                db.session.commit()
+                return render(self.accounts_schema, ac)
+        else:
+            status = probe(Accounts, account_id, current_user.user_id)
+            if status == 200:
+                return {'message': 'Missing parameter data'}, 400
+        if status == 403:
+            return {
+                    'message': 'Access to account is restricted to owner'
+                }, 403
+        return {'message': 'Account does not exist'}, 404
+
+    def patch(self, account_id):
+        """
+        Updates only the fields of account of id `account_id` present in the
+        request.
+        """
+        current_user = g.current_user
+        try:
+            changes = patch_values(Accounts, AccountsSchema)
+        except InvalidPatch as e:
+            return {'message': str(e)}, 400
+        minimal = prefers_minimal()
+        # with return=minimal nothing is read back after the UPDATE
+        ac, status = update_owned(
+            Accounts, account_id, current_user.user_id, changes,
+            None if minimal else schema_columns(Accounts, AccountsSchema))
+        if status == 200:
+            db.session.commit()
+            if minimal:
+                return minimal_response()
+            return render(self.accounts_schema, ac)
+        if status == 403:
+            return {
+                    'message': 'Access to account is restricted to owner'
+                }, 403
+        return {'message': 'Account does not exist'}, 404
 
     def delete(self, account_id):
         """
         Deletes Account of id `account_id`.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                ac = Accounts.query.get(account_id)
-                if ac:
-                    if ac.user_id == current_user.user_id:
-                        db.session.delete(ac)
-                        db.session.commit()
-                        return {}, 204
-                    return {
-                            'message': 'Access to account is restricted to owner'
-                        }, 403
-                return {'message': 'Account does not exist'}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        status = delete_owned(Accounts, account_id, current_user.user_id)
+        if status == 204:
+            db.session.commit()
+            return {}, 204
+        if status == 403:
+            return {
+                    'message': 'Access to account is restricted to owner'
+                }, 403
+        return {'message': 'Account does not exist'}, 404
 
 
 class ServicesListResource(Resource):
@@ -231,133 +436,160 @@ class ServicesListResource(Resource):
     Class encapsulates restful implementation of the Services resource.
     """
 
+    method_decorators = [authenticate]
+    # query string arguments the list may be filtered and sorted by
+    filters = ('price_min', 'price_max', 'name_prefix')
+    sorts = ('price', 'name')
+    invalid_token_status = 401
+
     def __init__(self):
         self.services_schema = ServicesSchema()
 
+    @conditional('services')
+    @sparse_fieldset(ServicesSchema)
     def get(self):
         """
         Lists all Services belonging to the currently logged in user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                all_services = Services.query.filter_by(
-                    user_id=current_user.user_id)
-                result = self.services_schema.dumps(all_services, many=True)
-                result_dict = json.loads(result.data)
-                return result_dict, 200
-            return {'message': 'Invalid token'}, 401
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        try:
+            ids = requested_ids()
+        except InvalidIds as e:
+            return {'message': str(e)}, 400
+        if ids is not None:
+            # `?ids=` fetches the rows of those ids by one query instead
+            return render_many(self.services_schema, *lookup_many(
+                Services, ids, current_user.user_id,
+                *fieldset_columns(Services, ServicesSchema)))
+        all_services = db.session.query(
+            *fieldset_columns(Services, ServicesSchema)
+        ).filter(Services.user_id == current_user.user_id)
+        try:
+            all_services, keys = filter_and_sort(
+                all_services, Services, self.filters, self.sorts)
+        except InvalidFilter as e:
+            return {'message': str(e)}, 400
+        return render_list(self.services_schema, all_services, keys)
 
     def post(self):
         """
         Creates a Service that belongs to the currently logged in user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('price')
-                values = parser.parse_args()
-
-                if None not in values.values() and '' not in values.values():
-                    result = self.services_schema.load(values)
-                    db.session.add(result.data)
-                    db.session.commit()
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('price')
+        values = parser.parse_args()
 
-                    json_result = self.services_schema.dumps(result.data)
-                    return json_result.data, 201
-                return {
-                        'message': 'Service name and price fields required'
-                        }, 400
-            return {'message': 'Invalid token'}, 401
-        return {'message': 'Unauthenticated request'}, 401
+        if None not in values.values() and '' not in values.values():
+            result = self.services_schema.load(values)
+            db.session.add(result.data)
+            db.session.commit()
+
+            return render(
+                self.services_schema, result.data, 201, as_string=True)
+        return {
+                'message': 'Service name and price fields required'
+                }, 400
 
 
 class ServicesDetailResource(Resource):
 
+    method_decorators = [authenticate]
+    invalid_token_status = 401
+
     def __init__(self):
         """
         Initializes instance variables
         """
         self.services_schema = ServicesSchema()
 
+    @conditional('services')
+    @sparse_fieldset(ServicesSchema)
     def get(self, service_id):
         """
         Returns the Service of id `service_id` belonging to currently logged in
         user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                get_service = Services.query.get(service_id)
-                if get_service:
-                    if get_service.user_id == current_user.user_id:
-                        json_result = self.services_schema.dumps(get_service)
-                        return json_result.data, 200
-                    return {
-                            'message': 'Access to service is restricted to owner'
-                        }, 403
-                return {'message': 'Service does not exist'}, 404
-            return {'message': 'Invalid token'}, 401
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        get_service, status = lookup(
+            Services, service_id, current_user.user_id,
+            *fieldset_options(Services, ServicesSchema))
+        if get_service:
+            return render(self.services_schema, get_service, as_string=True)
+        if status == 403:
+            return {
+                    'message': 'Access to service is restricted to owner'
+                }, 403
+        return {'message': 'Service does not exist'}, 404
 
     def put(self, service_id):
         """
         Updates an existing Service entry with provided data and returns the
         edited service.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                put_service = Services.query.get(service_id)
-                if put_service:
-                    if put_service.user_id == current_user.user_id:
-                        parser = reqparse.RequestParser()
-                        parser.add_argument('name')
-                        parser.add_argument('price')
-                        values = parser.parse_args()
-                        if values.get('name'):
-                            put_service.name = values.get('name')
-                        if values.get('price'):
-                            put_service.price = values.get('price')
-                        db.session.add(put_service)
-                        db.session.commit()
-                        json_result = self.services_schema.dumps(put_service)
-                        return json_result.data, 200
-                    return {
-                            'message': 'Access to service is restricted to owner'
-                        }, 403
-                return {'message': 'Service does not exist'}, 404
-            return {'message': 'Invalid token'}, 401
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('price')
+        values = parser.parse_args()
+        changes = {}
+        if values.get('name'):
+            changes['name'] = values.get('name')
+        if values.get('price'):
+            changes['price'] = values.get('price')
+        put_service, status = update_owned(
+            Services, service_id, current_user.user_id, changes,
+            schema_columns(Services, ServicesSchema))
+        if put_service:
+            db.session.commit()
+            return render(self.services_schema, put_service, as_string=True)
+        if status == 403:
+            return {
+                    'message': 'Access to service is restricted to owner'
+                }, 403
+        return {'message': 'Service does not exist'}, 404
+
+    def patch(self, service_id):
+        """
+        Updates only the fields of the Service of id `service_id` present in
+        the request.
+        """
+        current_user = g.current_user
+        try:
+            changes = patch_values(Services, ServicesSchema)
+        except InvalidPatch as e:
+            return {'message': str(e)}, 400
+        minimal = prefers_minimal()
+        # with return=minimal nothing is read back after the UPDATE
+        patch_service, status = update_owned(
+            Services, service_id, current_user.user_id, changes,
+            None if minimal else schema_columns(Services, ServicesSchema))
+        if status == 200:
+            db.session.commit()
+            if minimal:
+                return minimal_response()
+            return render(self.services_schema, patch_service)
+        if status == 403:
+            return {
+                    'message': 'Access to service is restricted to owner'
+                }, 403
+        return {'message': 'Service does not exist'}, 404
 
     def delete(self, service_id):
         """
         Deletes a service of id `service_id` if it belongs to the user
         associated with the authentication token provided.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                del_service = Services.query.get(service_id)
-                if del_service:
-                    if del_service.user_id == current_user.user_id:
-                        db.session.delete(del_service)
-                        db.session.commit()
-                        return '', 204
-                    return {
-                            'message': 'Access to service is restricted to owner'
-                        }, 403
-                return {'message': 'Service does not exist'}, 404
-            return {'message': 'Invalid token'}, 401
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        status = delete_owned(Services, service_id, current_user.user_id)
+        if status == 204:
+            db.session.commit()
+            return '', 204
+        if status == 403:
+            return {
+                    'message': 'Access to service is restricted to owner'
+                }, 403
+        return {'message': 'Service does not exist'}, 404
 
 
 class GoodsListResource(Resource):
@@ -365,45 +597,54 @@ class GoodsListResource(Resource):
     Class encapsulates restful implementation of the Goods list route.
     """
 
+    method_decorators = [authenticate]
+    # query string arguments the list may be filtered and sorted by
+    filters = ('price_min', 'price_max', 'necessary', 'name_prefix')
+    sorts = ('price', 'name')
+
     def __init__(self):
         self.goods_schema = GoodsSchema()
 
+    @conditional('goods')
+    @sparse_fieldset(GoodsSchema)
     def get(self):
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                all_goods = Goods.query.filter_by(user_id=current_user.user_id)
-                json_result = self.goods_schema.dumps(all_goods, many=True)
-                result_dict = json.loads(json_result.data)
-                return result_dict, 200
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        try:
+            ids = requested_ids()
+        except InvalidIds as e:
+            return {'message': str(e)}, 400
+        if ids is not None:
+            # `?ids=` fetches the rows of those ids by one query instead
+            return render_many(self.goods_schema, *lookup_many(
+                Goods, ids, current_user.user_id,
+                *fieldset_columns(Goods, GoodsSchema)))
+        all_goods = db.session.query(
+            *fieldset_columns(Goods, GoodsSchema)
+        ).filter(Goods.user_id == current_user.user_id)
+        try:
+            all_goods, keys = filter_and_sort(
+                all_goods, Goods, self.filters, self.sorts)
+        except InvalidFilter as e:
+            return {'message': str(e)}, 400
+        return render_list(self.goods_schema, all_goods, keys)
 
     def post(self):
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('price')
-                parser.add_argument('necessary')
-                values = parser.parse_args()
-
-                if None not in values.values():
-                    result = self.goods_schema.load(values)
-                    db.session.add(result.data)
-                    db.session.commit()
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('price')
+        parser.add_argument('necessary')
+        values = parser.parse_args()
 
-                    json_result = self.goods_schema.dumps(result.data)
-                    return json.loads(json_result.data), 201
-                return {
-                        'message': 'Name, price and necessary fields are' +
-                        ' all required'
-                        }, 400
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        if None not in values.values():
+            result = self.goods_schema.load(values)
+            db.session.add(result.data)
+            db.session.commit()
+
+            return render(self.goods_schema, result.data, 201)
+        return {
+                'message': 'Name, price and necessary fields are' +
+                ' all required'
+                }, 400
 
 
 class GoodsDetailResource(Resource):
@@ -411,82 +652,94 @@ class GoodsDetailResource(Resource):
     Class encapsulates restful implementation of the Goods detail route.
     """
 
+    method_decorators = [authenticate]
+
     def __init__(self):
         self.goods_schema = GoodsSchema()
 
+    @conditional('goods')
+    @sparse_fieldset(GoodsSchema)
     def get(self, good_id):
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                get_good = Goods.query.get(good_id)
-                if get_good:
-                    if get_good.user_id == current_user.user_id:
-                        json_result = self.goods_schema.dumps(get_good)
-                        return json.loads(json_result.data), 200
-                    return {
-                        'message': 'Access to good is restricted to owner'
-                    }, 403
-                feedback = 'Good of id {0} does not exist'.format(good_id)
-                return {'message': feedback}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        get_good, status = lookup(
+            Goods, good_id, current_user.user_id,
+            *fieldset_options(Goods, GoodsSchema))
+        if get_good:
+            return render(self.goods_schema, get_good)
+        if status == 403:
+            return {
+                'message': 'Access to good is restricted to owner'
+            }, 403
+        feedback = 'Good of id {0} does not exist'.format(good_id)
+        return {'message': feedback}, 404
 
     def put(self, good_id):
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('price')
-                parser.add_argument('necessary')
-                values = parser.parse_args()
-                # fetch the object from the DB
-                edit_good = Goods.query.get(good_id)
-                if edit_good:
-                    if edit_good.user_id == current_user.user_id:
-                        if values.get('name'):
-                            edit_good.name = values.get('name')
-                        if values.get('price'):
-                            edit_good.price = values.get('price')
-                        if values.get('necessary') in ['True', 'False']:
-                            # QUICK FIX
-                            data_from_json = self.goods_schema.load(values).data
-                            if type(data_from_json) == type({}):
-                                edit_good.necessary = data_from_json.get('necessary')
-                            else:
-                                edit_good.necessary = data_from_json.necessary
-                        db.session.add(edit_good)
-                        db.session.commit()
-                        json_result = self.goods_schema.dumps(edit_good)
-                        return json_result.data, 200
-                    return {
-                        'message': 'Access to good is restricted to owner'
-                    }, 403
-                feedback = 'Good of id {0} does not exist'.format(good_id)
-                return {'message': feedback}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('price')
+        parser.add_argument('necessary')
+        values = parser.parse_args()
+        changes = {}
+        if values.get('name'):
+            changes['name'] = values.get('name')
+        if values.get('price'):
+            changes['price'] = values.get('price')
+        if values.get('necessary') in ['True', 'False']:
+            changes['necessary'] = values.get('necessary') == 'True'
+        # update the row in place, without fetching it from the DB first
+        edit_good, status = update_owned(
+            Goods, good_id, current_user.user_id, changes,
+            schema_columns(Goods, GoodsSchema))
+        if edit_good:
+            db.session.commit()
+            return render(self.goods_schema, edit_good, as_string=True)
+        if status == 403:
+            return {
+                'message': 'Access to good is restricted to owner'
+            }, 403
+        feedback = 'Good of id {0} does not exist'.format(good_id)
+        return {'message': feedback}, 404
+
+    def patch(self, good_id):
+        """
+        Updates only the fields of the Good of id `good_id` present in the
+        request.
+        """
+        current_user = g.current_user
+        try:
+            changes = patch_values(Goods, GoodsSchema)
+        except InvalidPatch as e:
+            return {'message': str(e)}, 400
+        minimal = prefers_minimal()
+        # with return=minimal nothing is read back after the UPDATE
+        patch_good, status = update_owned(
+            Goods, good_id, current_user.user_id, changes,
+            None if minimal else schema_columns(Goods, GoodsSchema))
+        if status == 200:
+            db.session.commit()
+            if minimal:
+                return minimal_response()
+            return render(self.goods_schema, patch_good)
+        if status == 403:
+            return {
+                'message': 'Access to good is restricted to owner'
+            }, 403
+        feedback = 'Good of id {0} does not exist'.format(good_id)
+        return {'message': feedback}, 404
 
     def delete(self, good_id):
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                del_good = Goods.query.get(good_id)
-                if del_good:
-                    if del_good.user_id == current_user.user_id:
-                        db.session.delete(del_good)
-                        db.session.commit()
-                        return '', 204
-                    return {
-                        'message': 'Access to good is restricted to owner'
-                    }, 403
-                feedback = 'Good of id {0} does not exist'.format(good_id)
-                return {'message': feedback}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        status = delete_owned(Goods, good_id, current_user.user_id)
+        if status == 204:
+            db.session.commit()
+            return '', 204
+        if status == 403:
+            return {
+                'message': 'Access to good is restricted to owner'
+            }, 403
+        feedback = 'Good of id {0} does not exist'.format(good_id)
+        return {'message': feedback}, 404
 
 
 class OutletsListResource(Resource):
@@ -494,51 +747,64 @@ class OutletsListResource(Resource):
     Class encapsulates restful implementation of the Outlets list route.
     """
 
+    method_decorators = [authenticate]
+    # query string arguments the list may be filtered and sorted by
+    filters = ('name_prefix',)
+    sorts = ('name',)
+
     def __init__(self):
         """
         Instantiates class instance variables upon object instance creation.
         """
         self.outlet_schema = OutletSchema()
 
+    @conditional('outlets')
+    @sparse_fieldset(OutletSchema)
     def get(self):
         """
         List all outlets created by currently logged in user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                all_outlets = Outlets.query.filter_by(user=current_user)
-                json_result = self.outlet_schema.dumps(all_outlets, many=True)
-                return json_result.data, 200
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        try:
+            ids = requested_ids()
+        except InvalidIds as e:
+            return {'message': str(e)}, 400
+        if ids is not None:
+            # `?ids=` fetches the rows of those ids by one query instead
+            return render_many(self.outlet_schema, *lookup_many(
+                Outlets, ids, current_user.user_id,
+                *fieldset_columns(Outlets, OutletSchema)))
+        all_outlets = db.session.query(
+            *fieldset_columns(Outlets, OutletSchema)
+        ).filter(Outlets.user_id == current_user.user_id)
+        try:
+            all_outlets, keys = filter_and_sort(
+                all_outlets, Outlets, self.filters, self.sorts)
+        except InvalidFilter as e:
+            return {'message': str(e)}, 400
+        return render_list(
+            self.outlet_schema, all_outlets, keys, as_string=True)
 
     def post(self):
         """
         Create new outlet where creator will be the currently logged in user.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('postal_address')
-                parser.add_argument('location')
-                values = parser.parse_args()
-                if None not in values.values() and '' not in values.values():
-                    new_outlet = Outlets(**values)
-                    new_outlet.user_id = current_user.user_id
-                    db.session.add(new_outlet)
-                    db.session.commit()
-                    return {'message': 'Outlet created'}, 201
-                return {
-                        'message': 'Name, postal address and location are' +
-                        ' all required'
-                        }, 400
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('postal_address')
+        parser.add_argument('location')
+        values = parser.parse_args()
+        if None not in values.values() and '' not in values.values():
+            new_outlet = Outlets(**values)
+            new_outlet.user_id = current_user.user_id
+            db.session.add(new_outlet)
+            db.session.commit()
+            return {'message': 'Outlet created'}, 201
+        return {
+                'message': 'Name, postal address and location are' +
+                ' all required'
+                }, 400
 
 
 class OutletsDetailResource(Resource):
@@ -546,85 +812,99 @@ class OutletsDetailResource(Resource):
     Class encapsulates restful implementation of the Outlets detail route.
     """
 
+    method_decorators = [authenticate]
+
     def __init__(self):
         """
         Instantiates class instance variables upon object instance creation.
         """
         self.outlet_schema = OutletSchema()
 
+    @conditional('outlets')
+    @sparse_fieldset(OutletSchema)
     def get(self, outlet_id):
         """
         Returns details of Outlet whose id is `outlet_id`.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                one_outlet = Outlets.query.get(outlet_id)
-                if one_outlet:
-                    if one_outlet.user_id == current_user.user_id:
-                        json_result = self.outlet_schema.dumps(one_outlet)
-                        return json_result.data, 200
-                    return {
-                            'message': 'Get operation restricted to owner'
-                            }, 403
-                return {'message': 'Outlet does not exist'}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        one_outlet, status = lookup(
+            Outlets, outlet_id, current_user.user_id,
+            *fieldset_options(Outlets, OutletSchema))
+        if one_outlet:
+            return render(self.outlet_schema, one_outlet, as_string=True)
+        if status == 403:
+            return {
+                    'message': 'Get operation restricted to owner'
+                    }, 403
+        return {'message': 'Outlet does not exist'}, 404
 
     def put(self, outlet_id):
         """
         Updates `name` and/or `postal_address` of Outlet whose id is
         `outlet_id`.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                # get the update data from the client
-                parser = reqparse.RequestParser()
-                parser.add_argument('name')
-                parser.add_argument('postal_address')
-                values = parser.parse_args()
-                # fetch the object from the DB
-                edit_outlet = Outlets.query.get(outlet_id)
-                if edit_outlet:
-                    if edit_outlet.user_id == current_user.user_id:
-                        # update object properties only when new values have been provided
-                        # by the client
-                        if values.get('name'):
-                            edit_outlet.name = values.get('name')
-                        if values.get('postal_address'):
-                            edit_outlet.postal_address = values.get(
-                                'postal_address')
-                        db.session.add(edit_outlet)
-                        db.session.commit()
-                        json_result = self.outlet_schema.dumps(edit_outlet)
-                        return json_result.data, 200
-                    return {
-                            'message': 'Put operation restricted to owner'
-                            }, 403
-                return {'message': 'Outlet does not exist'}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
+        current_user = g.current_user
+        # get the update data from the client
+        parser = reqparse.RequestParser()
+        parser.add_argument('name')
+        parser.add_argument('postal_address')
+        values = parser.parse_args()
+        # update object properties only when new values have been provided
+        # by the client
+        changes = {}
+        if values.get('name'):
+            changes['name'] = values.get('name')
+        if values.get('postal_address'):
+            changes['postal_address'] = values.get('postal_address')
+        edit_outlet, status = update_owned(
+            Outlets, outlet_id, current_user.user_id, changes,
+            schema_columns(Outlets, OutletSchema))
+        if edit_outlet:
+            db.session.commit()
+            return render(self.outlet_schema, edit_outlet, as_string=True)
+        if status == 403:
+            return {
+                    'message': 'Put operation restricted to owner'
+                    }, 403
+        return {'message': 'Outlet does not exist'}, 404
+
+    def patch(self, outlet_id):
+        """
+        Updates only the fields of Outlet whose id is `outlet_id` present in
+        the request.
+        """
+        current_user = g.current_user
+        try:
+            changes = patch_values(Outlets, OutletSchema)
+        except InvalidPatch as e:
+            return {'message': str(e)}, 400
+        minimal = prefers_minimal()
+        # with return=minimal nothing is read back after the UPDATE
+        patch_outlet, status = update_owned(
+            Outlets, outlet_id, current_user.user_id, changes,
+            None if minimal else schema_columns(Outlets, OutletSchema))
+        if status == 200:
+            db.session.commit()
+            if minimal:
+                return minimal_response()
+            return render(self.outlet_schema, patch_outlet)
+        if status == 403:
+            return {
+                    'message': 'Patch operation restricted to owner'
+                    }, 403
+        return {'message': 'Outlet does not exist'}, 404
 
     def delete(self, outlet_id):
         """
         Deletes Outlet whose id is `outlet_id`.
         """
-        token = request.headers.get('username')
-        if token:
-            current_user = User.verify_auth_token(token)
-            if current_user:
-                del_outlet = Outlets.query.get(outlet_id)
-                if del_outlet:
-                    if current_user.user_id == del_outlet.user_id:
-                        db.session.delete(del_outlet)
-                        db.session.commit()
-                        return '', 204
-                    return {
-                            'message': 'Delete operation restricted to owner'
-                            }, 403
-                return {'message': 'Outlet does not exist'}, 404
-            return {'message': 'Invalid token'}, 403
-        return {'message': 'Unauthenticated request'}, 401
\ No newline at end of file
+        current_user = g.current_user
+        status = delete_owned(Outlets, outlet_id, current_user.user_id)
+        if status == 204:
+            db.session.commit()
+            return '', 204
+        if status == 403:
+            return {
+                    'message': 'Delete operation restricted to owner'
+                    }, 403
+        return {'message': 'Outlet does not exist'}, 404
\ No newline at end of file
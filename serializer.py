@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, fields, post_load, missing
+from marshmallow.utils import ensure_text_type
 
 from models import Goods, Services, Accounts
 
@@ -38,4 +39,91 @@ class AccountsSchema(Schema):
 
     @post_load
     def create_service(self, data):
-        return Accounts(**data)
\ No newline at end of file
+        return Accounts(**data)
+
+
+_compiled = {}
+
+
+def _boolean(value):
+    try:
+        if value in fields.Boolean.truthy:
+            return True
+        if value in fields.Boolean.falsy:
+            return False
+    except TypeError:
+        # unhashable values are neither truthy nor falsy strings
+        pass
+    return bool(value)
+
+
+# expressions converting `value` the way each field type serializes it
+_converters = {
+    fields.Integer: 'int(value)',
+    fields.String: 'ensure_text_type(value)',
+    fields.Boolean: '_boolean(value)',
+}
+
+
+def compile_schema(schema_class, only=None):
+    """
+    Returns a function that dumps one object the way `schema_class` does.
+
+    marshmallow looks up every field and its serialize method for every
+    object. The returned function is generated once with all of that
+    resolved, so dumping only costs an attribute read and a conversion per
+    field. The output matches `schema_class().dump(obj).data` for objects
+    exposing the fields as attributes, such as model instances and query
+    rows: attributes that are missing are left out and None stays None.
+    `only` restricts the dump to the given field names. Compiled functions
+    are cached per schema and field names.
+    """
+    key = (schema_class, frozenset(only) if only is not None else None)
+    if key in _compiled:
+        return _compiled[key]
+
+    lines = ['def dump(obj):', '    result = {}']
+    for name, field in schema_class().fields.items():
+        if only is not None and name not in only:
+            continue
+        converter = _converters.get(type(field))
+        if converter is None:
+            raise TypeError('Cannot compile {0} field {1!r}'.format(
+                type(field).__name__, name))
+        attribute = field.attribute or name
+        dump_to = field.dump_to or name
+        lines.extend([
+            '    value = getattr(obj, {0!r}, missing)'.format(attribute),
+            '    if value is not missing:',
+            '        result[{0!r}] = None if value is None else {1}'.format(
+                dump_to, converter),
+        ])
+    lines.append('    return result')
+    namespace = {
+        'missing': missing,
+        'ensure_text_type': ensure_text_type,
+        '_boolean': _boolean
+    }
+    exec('\n'.join(lines), namespace)
+    dump = namespace['dump']
+    dump.__doc__ = 'Dumps one object like {0} does.'.format(
+        schema_class.__name__)
+    _compiled[key] = dump
+    return dump
+
+
+def schema_columns(model, schema_class, only=None):
+    """
+    Returns the columns of `model` that `schema_class` dumps.
+
+    Querying these columns rather than the model yields plain named tuples
+    that the compiled dump functions read like model instances, without the
+    cost of building ORM objects and tracking them in the session. `only`
+    restricts the columns to the given field names.
+    """
+    columns = []
+    for name, field in schema_class().fields.items():
+        if only is not None and name not in only:
+            continue
+        columns.append(getattr(model, field.attribute or name))
+    return columns
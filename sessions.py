@@ -0,0 +1,188 @@
+import time
+import threading
+from datetime import datetime
+
+from sqlalchemy import bindparam, select
+
+
+def _to_datetime(timestamp):
+    return datetime.utcfromtimestamp(timestamp)
+
+
+class SessionStore(object):
+    """
+    Write-behind store of authentication sessions.
+
+    Opening a session (issuing a token) and closing it (logging out) only
+    touch memory on the request path. Opened sessions are written to the
+    session table in batches, once `flush_size` changes are pending or the
+    oldest one is `flush_interval` seconds old, on a connection of their own
+    so that auth traffic never writes to the user table. Closing a session
+    makes the pending changes due straight away and is recorded in the
+    revocation table, which is only ever inserted into, so it does not
+    depend on the session having been written by the process that opened
+    it. Revocations made by other processes are read back every
+    `sync_interval` seconds into `revoked`, the RevocationSet consulted when
+    authenticating tokens.
+    """
+
+    def __init__(self, db, table, revocation_table, revoked, flush_size=100,
+                 flush_interval=5, sync_interval=5):
+        """
+        Instantiates class instance variables upon object instance creation.
+        """
+        self.db = db
+        self.table = table
+        self.revocation_table = revocation_table
+        self.revoked = revoked
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self._opened = {}
+        self._closed = {}
+        self._oldest = None
+        self._last_sync = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """
+        Number of session changes not written to the database yet.
+        """
+        return len(self._opened) + len(self._closed)
+
+    def open(self, token_id, user_id, issued_at, expires_at):
+        """
+        Records a session for the token of id `token_id`.
+        """
+        with self._lock:
+            self._opened[token_id] = {
+                'token_id': token_id,
+                'user_id': user_id,
+                'issued_at': _to_datetime(issued_at),
+                'expires_at': _to_datetime(expires_at),
+                'revoked_at': None
+            }
+            self._touch()
+
+    def close(self, token_id, expires_at):
+        """
+        Ends the session of the token of id `token_id`.
+
+        The token is revoked in this process straight away and in every other
+        process once they sync with the database.
+        """
+        self.revoked.add(token_id, expires_at)
+        with self._lock:
+            now = _to_datetime(time.time())
+            if token_id in self._opened:
+                self._opened[token_id]['revoked_at'] = now
+            self._closed[token_id] = {
+                'token_id': token_id,
+                'revoked_at': now,
+                'expires_at': _to_datetime(expires_at)
+            }
+            self._touch()
+
+    def flush_if_due(self):
+        """
+        Flushes pending changes when they are due.
+
+        Pending changes are due once the batch is full or old enough, and
+        straight away when a session has been closed.
+        """
+        now = time.time()
+        with self._lock:
+            due = bool(self._closed) or self.pending >= self.flush_size or (
+                self.pending and now - self._oldest >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def sync_if_due(self):
+        """
+        Syncs revocations once `sync_interval` seconds have passed since the
+        last sync.
+        """
+        if time.time() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def flush(self):
+        """
+        Writes all pending session changes to the database in one transaction.
+
+        If the write fails the changes are kept pending for the next flush.
+        """
+        with self._lock:
+            opened, self._opened = self._opened, {}
+            closed, self._closed = self._closed, {}
+            oldest, self._oldest = self._oldest, None
+        if not opened and not closed:
+            return
+        try:
+            with self.db.engine.begin() as connection:
+                if opened:
+                    connection.execute(
+                        self.table.insert(), list(opened.values()))
+                if closed:
+                    connection.execute(
+                        self.revocation_table.insert(), list(closed.values()))
+                # record the revocations on the sessions written before
+                updates = [
+                    {'_token_id': token_id,
+                     '_revoked_at': revocation['revoked_at']}
+                    for token_id, revocation in closed.items()
+                    if token_id not in opened
+                ]
+                if updates:
+                    statement = self.table.update().where(
+                        self.table.c.token_id == bindparam('_token_id')
+                    ).values(revoked_at=bindparam('_revoked_at'))
+                    connection.execute(statement, updates)
+        except Exception:
+            with self._lock:
+                # changes made since the swap take precedence
+                opened.update(self._opened)
+                closed.update(self._closed)
+                self._opened, self._closed = opened, closed
+                if self._oldest is None or oldest < self._oldest:
+                    self._oldest = oldest
+            raise
+
+    def sync(self):
+        """
+        Adds the revoked tokens that have not expired yet to `revoked`.
+        """
+        self._last_sync = time.time()
+        table = self.revocation_table
+        statement = select([table.c.token_id, table.c.expires_at]).where(
+            table.c.expires_at > _to_datetime(self._last_sync))
+        with self.db.engine.connect() as connection:
+            for row in connection.execute(statement):
+                expires_at = (
+                    row.expires_at - datetime(1970, 1, 1)).total_seconds()
+                self.revoked.add(row.token_id, expires_at)
+
+    def prune(self):
+        """
+        Deletes sessions and revocations whose token has expired and returns
+        how many sessions were deleted.
+        """
+        now = _to_datetime(time.time())
+        with self.db.engine.begin() as connection:
+            connection.execute(self.revocation_table.delete().where(
+                self.revocation_table.c.expires_at <= now))
+            return connection.execute(self.table.delete().where(
+                self.table.c.expires_at <= now)).rowcount
+
+    def clear(self):
+        """
+        Drops all pending session changes.
+        """
+        with self._lock:
+            self._opened.clear()
+            self._closed.clear()
+            self._oldest = None
+
+    def _touch(self):
+        if self._oldest is None:
+            self._oldest = time.time()
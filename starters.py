@@ -8,9 +8,10 @@ from models import Outlets, Goods, Services, User
 from serializer import OutletSchema, GoodsSchema, ServicesSchema
 from restful.resources import app, api, db
 from restful.resources import (
-    UserResource, LoginResource, AccountListResource, AccountDetailResource,
-    ServicesListResource, ServicesDetailResource, GoodsListResource,
-    GoodsDetailResource, OutletsListResource, OutletsDetailResource
+    UserResource, BulkUserResource, LoginResource, RefreshResource,
+    AccountListResource, AccountDetailResource, ServicesListResource,
+    ServicesDetailResource, GoodsListResource, GoodsDetailResource,
+    OutletsListResource, OutletsDetailResource
     )
 
 not_found = {'detail': 'Not found.'}
@@ -23,7 +24,9 @@ def hello():
     return template.render()
 
 api.add_resource(UserResource, '/auth/new/')
+api.add_resource(BulkUserResource, '/auth/bulk/')
 api.add_resource(LoginResource, '/auth/logout/', '/auth/login/')
+api.add_resource(RefreshResource, '/auth/refresh/')
 api.add_resource(AccountListResource, '/accounts/')
 api.add_resource(AccountDetailResource, '/accounts/<int:account_id>/')
 api.add_resource(ServicesListResource, '/services/')
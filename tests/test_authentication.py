@@ -1,3 +1,5 @@
+import json
+
 from test_base import TestBase
 
 
@@ -61,4 +63,23 @@ class TestAuth(TestBase):
         # import ipdb; ipdb.set_trace()
         self.assertEqual(response.status, '400 BAD REQUEST')
         self.assertEqual(response.status_code, 400)
-        self.assertTrue('User does not exist' in response.data)
\ No newline at end of file
+        self.assertTrue('User does not exist' in response.data)
+
+    def test_authenticated_request_reports_auth_timing(self):
+        """Test that protected resources report the time spent on auth."""
+        user = {
+            'username': 'pythonista',
+            'password': 'pythonista'
+        }
+        response = self.client.post('/auth/login/', data=user)
+        token = json.loads(response.data).get('token')
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers.get('Server-Timing').startswith('auth;dur='))
+
+    def test_unauthenticated_request_skips_auth_timing(self):
+        """Test that no auth timing is reported when no token is sent."""
+        response = self.client.get('/goods/')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse('Server-Timing' in response.headers)
@@ -1,11 +1,14 @@
 import os
+import json
 import unittest
 
+from sqlalchemy import event
 from faker import Factory
 from flask.ext.fixtures import FixturesMixin
 
-from models import db
+from models import db, token_cache, revoked_tokens, session_store
 from starters import app
+from restful.auth import bulk_limiter, login_limiter
 
 test_url = os.environ.get('TEST_DATABASE_URL')
 app.config['SQLALCHEMY_DATABASE_URI'] = test_url
@@ -20,6 +23,11 @@ class TestBase(unittest.TestCase, FixturesMixin):
     def setUp(self):
         """Method to initialize test resources for every test that is run."""
         db.create_all()
+        token_cache.clear()
+        revoked_tokens.clear()
+        session_store.clear()
+        login_limiter.clear()
+        bulk_limiter.clear()
         self.client = app.test_client()
         self.fake = Factory.create()
         # import ipdb; ipdb.set_trace()
@@ -31,3 +39,20 @@ class TestBase(unittest.TestCase, FixturesMixin):
         test_db_path = test_url[10::]
         if os.path.exists(test_db_path):
             os.remove(test_db_path)
+
+    def login(self, username='pythonista', password='pythonista'):
+        """Logs in and returns the headers of an authenticated request."""
+        response = self.client.post(
+            '/auth/login/', data={'username': username, 'password': password})
+        return {'username': json.loads(response.data).get('token')}
+
+    def record_statements(self):
+        """Records the SQL statements executed in `self.statements`."""
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        self.addCleanup(
+            event.remove, db.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        self.statements.append(statement)
@@ -0,0 +1,187 @@
+import json
+
+from test_base import TestBase
+from models import app, User
+from restful.auth import bulk_limiter
+from restful.resources import BulkUserResource
+
+
+class TestBulkRegistration(TestBase):
+    """Test bulk registration of users."""
+
+    fixtures = ['user.json']
+
+    def setUp(self):
+        super(TestBulkRegistration, self).setUp()
+        self.admins = app.config['ADMINS']
+        app.config['ADMINS'] = ['pythonista']
+        self.capacity = bulk_limiter.capacity
+        self.headers = self.login()
+
+    def tearDown(self):
+        app.config['ADMINS'] = self.admins
+        bulk_limiter.capacity = self.capacity
+        super(TestBulkRegistration, self).tearDown()
+
+    def post_users(self, users, headers=None):
+        """Posts the users argument as JSON to the bulk registration url."""
+        return self.client.post(
+            '/auth/bulk/', data=json.dumps(users),
+            content_type='application/json',
+            headers=self.headers if headers is None else headers)
+
+    def test_successful_bulk_registration(self):
+        """
+        Test that every valid pair is registered and can log in.
+        """
+        users = [
+            {'username': self.fake.user_name() + str(i), 'password': 'secret'}
+            for i in range(5)
+        ]
+        response = self.post_users(users)
+        self.assertEqual(response.status_code, 200)
+        json_response = json.loads(response.data)
+        self.assertEqual(json_response.get('created'), 5)
+        self.assertEqual(
+            [r.get('username') for r in json_response.get('results')],
+            [u.get('username') for u in users])
+        self.assertEqual(len(User.query.all()), 7)
+        response = self.client.post('/auth/login/', data=users[3])
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_registration_per_item_results(self):
+        """
+        Test that invalid, duplicate and existing usernames are reported per
+        item while the valid ones are registered.
+        """
+        username = self.fake.user_name()
+        users = {
+            'users': [
+                {'username': username, 'password': 'secret'},
+                {'username': 'pythonista', 'password': 'secret'},
+                {'username': username, 'password': 'secret'},
+                {'username': self.fake.user_name() + 'x'},
+                {'password': 'secret'}
+            ]
+        }
+        response = self.post_users(users)
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data).get('results')
+        self.assertEqual(
+            [r.get('status') for r in results], [201, 400, 400, 400, 400])
+        self.assertEqual(
+            [r.get('message') for r in results[1:]], [
+                'User already exists', 'Duplicate username in request',
+                'Password missing', 'Username missing'
+            ])
+        self.assertEqual(len(User.query.all()), 3)
+
+    def test_bulk_registration_rejects_malformed_items(self):
+        """
+        Test that usernames and passwords that are not strings are reported
+        per item.
+        """
+        users = [
+            {'username': {'name': 'x'}, 'password': 'secret'},
+            {'username': self.fake.user_name(), 'password': 123},
+            {'username': self.fake.user_name() + 'y', 'password': 'secret'}
+        ]
+        response = self.post_users(users)
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data).get('results')
+        self.assertEqual([r.get('status') for r in results], [400, 400, 201])
+        self.assertEqual(
+            [r.get('message') for r in results[:2]],
+            ['Username must be a string', 'Password must be a string'])
+        self.assertEqual(len(User.query.all()), 3)
+
+    def test_bulk_registration_retries_concurrent_conflicts(self):
+        """
+        Test that usernames registered concurrently are skipped however many
+        times the insert conflicts.
+        """
+        existing_usernames = BulkUserResource.existing_usernames
+        # pretend both fixture users were registered while the request ran,
+        # one after the other
+        seen = iter([set(), set(['pythonista'])])
+
+        def racing_usernames(usernames, chunk_size=500):
+            found = next(seen, None)
+            if found is None:
+                return existing_usernames(usernames)
+            return found
+
+        BulkUserResource.existing_usernames = staticmethod(racing_usernames)
+        try:
+            response = self.post_users([
+                {'username': 'pythonista', 'password': 'secret'},
+                {'username': 'ruby', 'password': 'secret'},
+                {'username': self.fake.user_name(), 'password': 'secret'}
+            ])
+        finally:
+            BulkUserResource.existing_usernames = staticmethod(
+                existing_usernames)
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data).get('results')
+        self.assertEqual([r.get('status') for r in results], [400, 400, 201])
+        self.assertEqual(len(User.query.all()), 3)
+
+    def test_bulk_registration_without_users(self):
+        """
+        Test bulk registration when no list of users is sent.
+        """
+        response = self.post_users({'users': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue('A list of users is required' in response.data)
+        response = self.client.post(
+            '/auth/bulk/', data={'username': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_registration_too_many_users(self):
+        """
+        Test that requests above BULK_REGISTRATION_MAX are rejected.
+        """
+        limit = app.config['BULK_REGISTRATION_MAX']
+        app.config['BULK_REGISTRATION_MAX'] = 2
+        try:
+            users = [
+                {'username': self.fake.user_name() + str(i), 'password': 'x'}
+                for i in range(3)
+            ]
+            response = self.post_users(users)
+        finally:
+            app.config['BULK_REGISTRATION_MAX'] = limit
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue('At most 2 users' in response.data)
+        self.assertEqual(len(User.query.all()), 2)
+
+    def test_bulk_registration_is_restricted_to_admins(self):
+        """
+        Test that anonymous requests get a 401 and requests with an invalid
+        token or of users who are not admins a 403, without registering
+        anyone.
+        """
+        users = [{'username': self.fake.user_name(), 'password': 'secret'}]
+        response = self.post_users(users, headers={})
+        self.assertEqual(response.status_code, 401)
+        response = self.post_users(users, headers={'username': 'bad'})
+        self.assertEqual(response.status_code, 403)
+        response = self.post_users(
+            users, headers=self.login('ruby', 'pythonista'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(User.query.all()), 2)
+
+    def test_bulk_registration_rate_limited_per_user(self):
+        """
+        Test that every user registered counts against the rate limit.
+        """
+        bulk_limiter.capacity = 5
+        users = [
+            {'username': self.fake.user_name() + str(i), 'password': 'x'}
+            for i in range(4)
+        ]
+        self.assertEqual(self.post_users(users).status_code, 200)
+        response = self.post_users(users[:2])
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.headers.get('Retry-After'))
+        self.assertEqual(len(User.query.all()), 6)
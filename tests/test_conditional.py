@@ -0,0 +1,115 @@
+from test_base import TestBase
+from models import db, Goods, User, bump_versions, collection_version
+
+
+class TestConditionalRequests(TestBase):
+    """Test ETags and 304 responses of list and detail resources."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestConditionalRequests, self).setUp()
+        self.headers = self.login()
+
+    def get(self, url, etag=None, **headers):
+        """Requests `url` as the fixture user, conditionally on `etag`."""
+        headers.update(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.client.get(url, headers=headers)
+
+    def test_matching_etag_gets_not_modified(self):
+        """
+        Test that repeating a request with its ETag gets an empty 304.
+        """
+        for url in ('/goods/', '/goods/1/', '/services/', '/accounts/'):
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers.get('ETag')
+            self.assertTrue(etag)
+            response = self.get(url, etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, '')
+            self.assertEqual(response.headers.get('ETag'), etag)
+
+    def test_changes_invalidate_etag(self):
+        """
+        Test that updating a good changes the ETags of the goods resources
+        but not those of other collections.
+        """
+        goods_etag = self.get('/goods/').headers.get('ETag')
+        services_etag = self.get('/services/').headers.get('ETag')
+        response = self.client.put(
+            '/goods/1/', data={'name': 'Bread'}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.get('/goods/', goods_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers.get('ETag'), goods_etag)
+        self.assertEqual(self.get('/services/', services_etag).status_code, 304)
+
+    def test_etag_differs_per_representation(self):
+        """
+        Test that an ETag of one URL or format does not match another.
+        """
+        etag = self.get('/goods/1/').headers.get('ETag')
+        self.assertEqual(self.get('/goods/2/', etag).status_code, 200)
+        response = self.get('/goods/', self.get('/goods/').headers.get('ETag'),
+                            Accept='text/csv')
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors_are_not_tagged(self):
+        """
+        Test that error responses carry no ETag.
+        """
+        response = self.get('/goods/999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(response.headers.get('ETag'))
+
+    def test_flush_and_bulk_changes_bump_versions(self):
+        """
+        Test that ORM changes bump versions on flush and that `bump_versions`
+        bumps them for bulk statements.
+        """
+        goods = collection_version(1, 'goods')
+        services = collection_version(1, 'services')
+        others = collection_version(2, 'goods')
+        good = Goods.query.get(1)
+        good.price = 5
+        db.session.commit()
+        self.assertEqual(collection_version(1, 'goods'), goods + 1)
+        db.session.delete(good)
+        db.session.commit()
+        self.assertEqual(collection_version(1, 'goods'), goods + 2)
+        self.assertEqual(collection_version(1, 'services'), services)
+        bump_versions(db.session.connection(), 1, 'services', 'outlets')
+        db.session.commit()
+        self.assertEqual(collection_version(1, 'services'), services + 1)
+        self.assertEqual(collection_version(1, 'outlets'), 1)
+        self.assertEqual(collection_version(2, 'goods'), others)
+
+    def test_unmodified_flush_does_not_bump_version(self):
+        """
+        Test that loading rows or setting unchanged values bumps nothing.
+        """
+        version = collection_version(1, 'goods')
+        good = Goods.query.get(1)
+        good.name = good.name
+        db.session.add(User(username='someone'))
+        db.session.commit()
+        self.assertEqual(collection_version(1, 'goods'), version)
+
+    def test_changes_do_not_update_user(self):
+        """
+        Test that bumping versions writes to the version table only and never
+        to the row of the user.
+        """
+        self.record_statements()
+        response = self.client.put(
+            '/goods/1/', data={'name': 'Bread'}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.delete('/goods/2/', headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        updates = [s for s in self.statements if s.startswith('UPDATE')]
+        self.assertTrue(any('collection_version' in s for s in updates))
+        self.assertFalse(any(
+            s.startswith(('UPDATE user', 'UPDATE "user"')) for s in updates))
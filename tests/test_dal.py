@@ -0,0 +1,108 @@
+from test_base import TestBase
+from dal import delete_owned, lookup, probe, update_owned
+from models import db, Goods, GoodsPurchased, collection_version
+from serializer import GoodsSchema, schema_columns
+
+
+class TestScopedLookups(TestBase):
+    """Test owner scoped detail lookups."""
+
+    fixtures = ['user.json', 'goods.json']
+
+    def setUp(self):
+        super(TestScopedLookups, self).setUp()
+        self.record_statements()
+
+    def test_owned_row_is_loaded_by_one_query(self):
+        """
+        Test that an owned row is found with a single owner scoped query.
+        """
+        good, status = lookup(Goods, 1, 1)
+        self.assertEqual((good.id, status), (1, 200))
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn('goods.user_id = ?', self.statements[0])
+        self.assertIn('goods.id = ?', self.statements[0])
+
+    def test_other_users_row_is_forbidden_without_loading_it(self):
+        """
+        Test that a row of another user gets a 403 after an existence probe
+        that loads none of its columns.
+        """
+        good, status = lookup(Goods, 3, 1)
+        self.assertEqual((good, status), (None, 403))
+        self.assertEqual(len(self.statements), 2)
+        self.assertIn('EXISTS', self.statements[1])
+        self.assertNotIn('goods.name', self.statements[1])
+
+    def test_missing_row_is_not_found(self):
+        """
+        Test that a row that does not exist gets a 404.
+        """
+        self.assertEqual(lookup(Goods, 999, 1), (None, 404))
+
+    def test_resources_use_scoped_lookups(self):
+        """
+        Test that detail routes still tell 403 from 404.
+        """
+        headers = self.login()
+        for method in ('get', 'put', 'delete'):
+            request = getattr(self.client, method)
+            self.assertEqual(
+                request('/goods/3/', headers=headers).status_code, 403)
+            self.assertEqual(
+                request('/goods/999/', headers=headers).status_code, 404)
+
+    def test_update_changes_owned_row_without_loading_it_first(self):
+        """
+        Test that an owned row is updated before anything is selected and
+        that the update bumps the goods version.
+        """
+        version = collection_version(1, 'goods')
+        del self.statements[:]
+        row, status = update_owned(
+            Goods, 1, 1, {'name': 'Bread'}, schema_columns(Goods, GoodsSchema))
+        self.assertEqual((row.name, row.id, status), ('Bread', 1, 200))
+        self.assertTrue(self.statements[0].startswith('UPDATE goods'))
+        db.session.commit()
+        self.assertEqual(Goods.query.get(1).name, 'Bread')
+        self.assertEqual(collection_version(1, 'goods'), version + 1)
+
+    def test_update_leaves_other_users_rows_alone(self):
+        """
+        Test that updating a row of another user changes nothing.
+        """
+        columns = schema_columns(Goods, GoodsSchema)
+        self.assertEqual(
+            update_owned(Goods, 3, 1, {'name': 'Bread'}, columns), (None, 403))
+        self.assertEqual(
+            update_owned(Goods, 999, 1, {'name': 'Bread'}, columns),
+            (None, 404))
+        db.session.commit()
+        self.assertNotEqual(Goods.query.get(3).name, 'Bread')
+
+    def test_delete_orphans_purchases_of_owned_row(self):
+        """
+        Test that deleting a good clears the purchases pointing at it and
+        that rows of other users are not deleted.
+        """
+        db.session.add_all([
+            GoodsPurchased(user_id=1, good_id=1, price=10),
+            GoodsPurchased(user_id=2, good_id=3, price=10)
+        ])
+        db.session.commit()
+        self.assertEqual(delete_owned(Goods, 3, 1), 403)
+        self.assertEqual(delete_owned(Goods, 1, 1), 204)
+        self.assertEqual(delete_owned(Goods, 999, 1), 404)
+        db.session.commit()
+        self.assertIsNone(Goods.query.get(1))
+        self.assertIsNotNone(Goods.query.get(3))
+        self.assertEqual(
+            sorted(p.good_id for p in GoodsPurchased.query), [None, 3])
+
+    def test_probe(self):
+        """
+        Test that probing tells owned, foreign and missing rows apart.
+        """
+        self.assertEqual(
+            [probe(Goods, 1, 1), probe(Goods, 3, 1), probe(Goods, 999, 1)],
+            [200, 403, 404])
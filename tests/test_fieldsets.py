@@ -0,0 +1,84 @@
+import csv
+import json
+
+from test_base import TestBase
+
+
+class TestSparseFieldsets(TestBase):
+    """Test restricting responses to the fields requested with `?fields=`."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestSparseFieldsets, self).setUp()
+        self.headers = self.login()
+        self.record_statements()
+
+    def selects_from(self, table):
+        """Returns the SELECT statements executed against `table`."""
+        return [
+            statement for statement in self.statements
+            if statement.startswith('SELECT') and
+            'FROM {0}'.format(table) in statement
+        ]
+
+    def test_list_returns_and_selects_only_requested_fields(self):
+        """
+        Test that list responses and their query only hold requested fields.
+        """
+        response = self.client.get(
+            '/goods/?fields=id,name', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        goods = json.loads(response.data)
+        self.assertEqual(len(goods), 2)
+        for good in goods:
+            self.assertEqual(sorted(good), ['id', 'name'])
+        select = self.selects_from('goods')[-1]
+        self.assertNotIn('goods.price', select)
+        self.assertNotIn('goods.necessary', select)
+
+    def test_detail_returns_and_loads_only_requested_fields(self):
+        """
+        Test that detail responses and their query only hold requested
+        fields.
+        """
+        response = self.client.get(
+            '/goods/1/?fields=name', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data).keys(), ['name'])
+        self.assertNotIn('goods.price', self.selects_from('goods')[-1])
+
+    def test_streamed_and_csv_lists_honour_fields(self):
+        """
+        Test that streamed JSON and CSV responses are restricted too.
+        """
+        response = self.client.get(
+            '/goods/?fields=name&stream=true', headers=self.headers)
+        self.assertEqual(
+            [good.keys() for good in json.loads(response.data)],
+            [['name'], ['name']])
+        headers = dict(self.headers, Accept='text/csv')
+        response = self.client.get(
+            '/goods/?fields=price,name', headers=headers)
+        rows = list(csv.reader(response.data.splitlines()))
+        self.assertEqual(rows[0], ['name', 'price'])
+
+    def test_unknown_fields_are_rejected(self):
+        """
+        Test that fields missing from the schema get a 400.
+        """
+        response = self.client.get(
+            '/goods/?fields=id,password_hash', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data).get('message'),
+                         'Unknown fields: password_hash')
+        response = self.client.get('/goods/1/?fields=', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_fields_returns_every_field(self):
+        """
+        Test that requests without `fields` get every field.
+        """
+        response = self.client.get('/goods/1/', headers=self.headers)
+        self.assertEqual(sorted(json.loads(response.data)),
+                         ['id', 'name', 'necessary', 'price'])
@@ -0,0 +1,143 @@
+import json
+import re
+
+from test_base import TestBase
+from models import db, Goods, Outlets
+
+
+class TestFiltering(TestBase):
+    """Test filtering and sorting of list resources."""
+
+    fixtures = ['user.json']
+
+    def setUp(self):
+        super(TestFiltering, self).setUp()
+        db.session.execute(Goods.__table__.insert(), [
+            {'name': name, 'price': price, 'necessary': necessary,
+             'user_id': user_id}
+            for name, price, necessary, user_id in [
+                ('bread', 50, True, 1), ('butter', 300, True, 1),
+                ('beer', 200, False, 1), ('cake', 200, False, 1),
+                ('b%d', 10, False, 1), ('bacon', 400, True, 2)
+            ]
+        ])
+        outlet = Outlets('Naivas', 'P.O. Box 1', 'Nairobi')
+        outlet.user_id = 1
+        db.session.add(outlet)
+        db.session.commit()
+        self.headers = self.login()
+
+    def names(self, url):
+        """Returns the names of the rows listed at `url`."""
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(response.data)
+        if url.startswith('/outlets/'):
+            # outlet lists are JSON strings holding the JSON array
+            rows = json.loads(rows)
+        return [row.get('name') for row in rows]
+
+    def test_filters(self):
+        """
+        Test that price range, necessary and name prefix filters combine.
+        """
+        self.assertEqual(
+            self.names('/goods/?price_min=100&price_max=300&sort=name'),
+            ['beer', 'butter', 'cake'])
+        self.assertEqual(self.names('/goods/?necessary=true&sort=name'),
+                         ['bread', 'butter'])
+        self.assertEqual(
+            self.names('/goods/?name_prefix=b&necessary=false&sort=name'),
+            ['b%d', 'beer'])
+        self.assertEqual(self.names('/outlets/?name_prefix=Nai'), ['Naivas'])
+
+    def test_name_prefix_matches_wildcards_literally(self):
+        """
+        Test that LIKE wildcards in a prefix are not treated as wildcards.
+        """
+        self.assertEqual(self.names('/goods/?name_prefix=b%25'), ['b%d'])
+        self.assertEqual(self.names('/goods/?name_prefix=_'), [])
+
+    def test_sort_orders(self):
+        """
+        Test ascending and descending sorts, with ties broken by id.
+        """
+        self.assertEqual(
+            self.names('/goods/?sort=-price'),
+            ['butter', 'cake', 'beer', 'bread', 'b%d'])
+        self.assertEqual(
+            self.names('/goods/?sort=price'),
+            ['b%d', 'bread', 'beer', 'cake', 'butter'])
+
+    def test_sorted_pages_follow_cursor(self):
+        """
+        Test that pages of a sorted list continue where the last one ended.
+        """
+        url = '/goods/?sort=-price&page_size=2'
+        names = []
+        while url:
+            response = self.client.get(url, headers=self.headers)
+            names.extend(row.get('name') for row in json.loads(response.data))
+            link = response.headers.get('Link')
+            url = link and re.match(r'<http://localhost(.+)>', link).group(1)
+        self.assertEqual(names, ['butter', 'cake', 'beer', 'bread', 'b%d'])
+
+    def test_sorted_pages_include_null_values(self):
+        """
+        Test that pages sorted on a column continue past rows whose value is
+        NULL in both directions.
+        """
+        db.session.execute(Goods.__table__.insert(), [
+            {'name': 'salt', 'price': None, 'necessary': True, 'user_id': 1},
+            {'name': 'sugar', 'price': None, 'necessary': True, 'user_id': 1}
+        ])
+        db.session.commit()
+        for sort in ('price', '-price'):
+            url = '/goods/?sort={0}&page_size=1'.format(sort)
+            names = []
+            while url:
+                response = self.client.get(url, headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+                names.extend(
+                    row.get('name') for row in json.loads(response.data))
+                link = response.headers.get('Link')
+                url = link and re.match(
+                    r'<http://localhost(.+)>', link).group(1)
+            self.assertEqual(names, self.names(
+                '/goods/?sort={0}&paginate=false'.format(sort)))
+            self.assertEqual(len(names), 7)
+
+    def test_lists_sort_by_id(self):
+        """
+        Test that every list can be sorted by id in either direction.
+        """
+        self.assertEqual(
+            self.names('/goods/?sort=-id'),
+            ['b%d', 'cake', 'beer', 'butter', 'bread'])
+        for url in ('/accounts/?sort=id', '/outlets/?sort=-id'):
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+
+    def test_cursor_must_match_sort(self):
+        """
+        Test that a cursor cannot be reused with another sort order.
+        """
+        response = self.client.get(
+            '/goods/?sort=name&page_size=1', headers=self.headers)
+        cursor = re.search(
+            r'cursor=([^&>]+)', response.headers.get('Link')).group(1)
+        response = self.client.get(
+            '/goods/?sort=price&cursor=' + cursor, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_arguments_are_rejected(self):
+        """
+        Test that unparsable values, unknown filters and sorts outside the
+        whitelist get a 400.
+        """
+        for url in ('/goods/?price_min=cheap', '/goods/?necessary=maybe',
+                    '/goods/?sort=user_id', '/outlets/?sort=price',
+                    '/accounts/?sort=name', '/outlets/?price_min=abc',
+                    '/goods/?bogus=1', '/accounts/?name_prefix=a'):
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+
+from test_base import TestBase
+from hashing import HashingPool, HashingPoolBusy, calibrate
+from models import User, hashing_pool
+
+
+class TestHashing(TestBase):
+    """Test password hashing through the hashing pool."""
+
+    fixtures = ['user.json']
+
+    def test_pool_hashes_and_verifies(self):
+        """
+        Test that hashes computed by worker processes can be verified.
+        """
+        pool = HashingPool(processes=2, max_pending=2)
+        try:
+            password_hash = pool.encrypt('pythonista')
+            self.assertTrue(password_hash.startswith('$6$'))
+            self.assertTrue(pool.verify('pythonista', password_hash))
+            self.assertFalse(pool.verify('rubyist', password_hash))
+        finally:
+            pool.close()
+
+    def test_saturated_pool_fails_fast(self):
+        """
+        Test that HashingPoolBusy is raised when no hashing slot is free.
+        """
+        pool = HashingPool(processes=0, max_pending=1)
+        # occupy the only slot
+        pool._slots.acquire()
+        self.assertRaises(HashingPoolBusy, pool.encrypt, 'pythonista')
+        pool._slots.release()
+        self.assertTrue(pool.encrypt('pythonista'))
+
+    def test_abandoned_work_keeps_its_slot(self):
+        """
+        Test that an operation that timed out holds its slot until it
+        completes, so that callers fail fast rather than queue behind it.
+        """
+        pool = HashingPool(processes=1, max_pending=1, timeout=0.2)
+        try:
+            self.assertRaises(HashingPoolBusy, pool.run, time.sleep, 1)
+            start = time.time()
+            self.assertRaises(HashingPoolBusy, pool.run, time.sleep, 0)
+            self.assertTrue(time.time() - start < 0.1)
+            time.sleep(1.5)
+            self.assertEqual(pool.run(abs, -1), 1)
+        finally:
+            pool.close()
+
+    def test_failed_work_frees_its_slot(self):
+        """
+        Test that errors raised by an operation reach the caller and free
+        its slot.
+        """
+        pool = HashingPool(processes=1, max_pending=1)
+        try:
+            self.assertRaises(ValueError, pool.run, int, 'x')
+            self.assertEqual(pool.run(int, '1'), 1)
+        finally:
+            pool.close()
+
+    def test_login_with_saturated_pool(self):
+        """
+        Test that login responds with 503 when the hashing pool is saturated.
+        """
+        slots = hashing_pool._slots
+        hashing_pool._slots = threading.BoundedSemaphore(1)
+        hashing_pool._slots.acquire()
+        try:
+            user = {
+                'username': 'pythonista',
+                'password': 'pythonista'
+            }
+            response = self.client.post('/auth/login/', data=user)
+        finally:
+            hashing_pool._slots = slots
+        self.assertEqual(response.status, '503 SERVICE UNAVAILABLE')
+        self.assertEqual(response.headers.get('Retry-After'), '1')
+        self.assertEqual(
+            json.loads(response.data),
+            {'message': 'Server is busy, please try again later'})
+
+    def test_registration_with_saturated_pool(self):
+        """
+        Test that registration responds with 503 and creates no user when the
+        hashing pool is saturated.
+        """
+        slots = hashing_pool._slots
+        hashing_pool._slots = threading.BoundedSemaphore(1)
+        hashing_pool._slots.acquire()
+        username = self.fake.user_name()
+        try:
+            user = {
+                'username': username,
+                'password': self.fake.password()
+            }
+            response = self.client.post('/auth/new/', data=user)
+        finally:
+            hashing_pool._slots = slots
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.query.filter_by(username=username).first())
+
+    def test_calibrate(self):
+        """
+        Test that calibration returns a usable number of rounds.
+        """
+        rounds = calibrate(5, probe_rounds=5000, samples=1)
+        self.assertTrue(1000 <= rounds <= 999999999)
+        self.assertEqual(rounds % 1000, 0)
+
+    def test_login_rehashes_password_outside_policy(self):
+        """
+        Test that a successful login re-hashes a password whose hash does not
+        follow the configured rounds policy.
+        """
+        old_hash = User.query.get(1).password_hash
+        self.assertTrue(old_hash.startswith('$6$rounds=659657$'))
+        hashing_pool.rounds = 5000
+        try:
+            user = {
+                'username': 'pythonista',
+                'password': 'pythonista'
+            }
+            response = self.client.post('/auth/login/', data=user)
+            self.assertEqual(response.status_code, 200)
+            new_hash = User.query.get(1).password_hash
+            self.assertNotEqual(new_hash, old_hash)
+            self.assertFalse(new_hash.startswith('$6$rounds='))
+            # the new hash follows the policy and is kept on the next login
+            response = self.client.post('/auth/login/', data=user)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(User.query.get(1).password_hash, new_hash)
+        finally:
+            hashing_pool.rounds = None
+
+    def test_failed_login_keeps_password_hash(self):
+        """
+        Test that a failed login never re-hashes the stored password.
+        """
+        old_hash = User.query.get(1).password_hash
+        hashing_pool.rounds = 5000
+        try:
+            user = {
+                'username': 'pythonista',
+                'password': self.fake.password()
+            }
+            response = self.client.post('/auth/login/', data=user)
+            self.assertEqual(response.status_code, 400)
+        finally:
+            hashing_pool.rounds = None
+        self.assertEqual(User.query.get(1).password_hash, old_hash)
+
+    def test_batch_gives_up_after_batch_timeout(self):
+        """
+        Test that a batch waits for a slot to free up and raises
+        HashingPoolBusy once `batch_timeout` has passed.
+        """
+        pool = HashingPool(processes=0, max_pending=1, batch_timeout=0.2)
+        pool._slots.acquire()
+        start = time.time()
+        self.assertRaises(HashingPoolBusy, pool.encrypt_many, ['a'])
+        self.assertTrue(time.time() - start >= 0.2)
+        pool._slots.release()
+        self.assertEqual(len(pool.encrypt_many(['a', 'b'])), 2)
+
+    def test_pool_encrypts_many_passwords(self):
+        """
+        Test that passwords hashed in parallel keep their order.
+        """
+        pool = HashingPool(processes=2, max_pending=1)
+        try:
+            hashes = pool.encrypt_many(['a', 'b', 'c'])
+            self.assertEqual(len(hashes), 3)
+            self.assertTrue(pool.verify('a', hashes[0]))
+            self.assertTrue(pool.verify('c', hashes[2]))
+            self.assertFalse(pool.verify('a', hashes[1]))
+        finally:
+            pool.close()
@@ -0,0 +1,36 @@
+from test_base import TestBase
+from models import db, Goods, Services, Outlets
+from restful.pagination import after, ordering
+
+
+class TestIndexes(TestBase):
+    """Test that listing owned rows is served by the composite indexes."""
+
+    def plan(self, query):
+        """Returns SQLite's query plan of `query` as one string."""
+        statement = query.statement.compile(
+            db.engine, compile_kwargs={'literal_binds': True})
+        rows = db.session.execute('EXPLAIN QUERY PLAN {0}'.format(statement))
+        return ' '.join(list(row)[-1] for row in rows)
+
+    def test_list_orders_use_indexes(self):
+        """
+        Test that every sort order lists a page without a full scan or a
+        temporary sort.
+        """
+        cases = [
+            (Goods, [(Goods.id, False)], [10], 'ix_goods_user_id_id'),
+            (Goods, [(Goods.price, True), (Goods.id, True)], [5, 10],
+             'ix_goods_user_id_price_id'),
+            (Services, [(Services.name, False), (Services.id, False)],
+             ['a', 10], 'ix_services_user_id_name_id'),
+            (Outlets, [(Outlets.name, True), (Outlets.id, True)],
+             ['a', 10], 'ix_outlets_user_id_name_id'),
+        ]
+        for model, keys, values, index in cases:
+            query = db.session.query(model.id, model.name).filter(
+                model.user_id == 1).filter(after(keys, values)).order_by(
+                *ordering(keys)).limit(51)
+            plan = self.plan(query)
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
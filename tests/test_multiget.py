@@ -0,0 +1,78 @@
+import json
+
+from test_base import TestBase
+from app import app
+from dal import lookup_many
+from models import Goods
+
+
+class TestMultiGet(TestBase):
+    """Test fetching many rows by id with `?ids=`."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestMultiGet, self).setUp()
+        self.headers = self.login()
+        self.record_statements()
+        self.max_ids = app.config['MAX_MULTI_GET_IDS']
+
+    def tearDown(self):
+        app.config['MAX_MULTI_GET_IDS'] = self.max_ids
+        super(TestMultiGet, self).tearDown()
+
+    def test_ids_map_to_their_status(self):
+        """
+        Test that owned ids map to their row, ids of other users to a 403
+        and unknown ids to a 404.
+        """
+        response = self.client.get(
+            '/goods/?ids=1,3,999,2', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(sorted(data), ['1', '2', '3', '999'])
+        self.assertEqual(data['1']['status'], 200)
+        self.assertEqual(data['1']['data']['name'], 'Silvio Wolf')
+        self.assertEqual(data['2']['data']['id'], 2)
+        self.assertEqual(data['3'], {'status': 403})
+        self.assertEqual(data['999'], {'status': 404})
+
+    def test_owned_rows_are_read_by_one_query(self):
+        """
+        Test that owned rows are read by a single IN query and that missing
+        ids are only probed when there are any.
+        """
+        rows, statuses = lookup_many(Goods, [1, 2], 1, Goods.name)
+        self.assertEqual(statuses, {1: 200, 2: 200})
+        self.assertEqual(rows[1].name, 'Silvio Wolf')
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn('IN', self.statements[0])
+        self.assertIn('goods.user_id = ?', self.statements[0])
+        del self.statements[:]
+        rows, statuses = lookup_many(Goods, [1, 3, 999], 1, Goods.name)
+        self.assertEqual(statuses, {1: 200, 3: 403, 999: 404})
+        self.assertEqual(list(rows), [1])
+        self.assertEqual(len(self.statements), 2)
+        self.assertNotIn('goods.name', self.statements[1])
+
+    def test_fields_restrict_the_rows(self):
+        """
+        Test that `?fields=` restricts the rows of a multi-get.
+        """
+        response = self.client.get(
+            '/services/?ids=1,2&fields=name', headers=self.headers)
+        data = json.loads(response.data)
+        self.assertEqual(list(data['1']['data']), ['name'])
+        self.assertEqual(list(data['2']['data']), ['name'])
+
+    def test_invalid_ids_are_rejected(self):
+        """
+        Test that non integer ids, empty lists and too many ids get a 400.
+        """
+        app.config['MAX_MULTI_GET_IDS'] = 2
+        for ids in ('1,a', ',', '1,2,3'):
+            response = self.client.get(
+                '/goods/?ids={0}'.format(ids), headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get('/goods/?ids=1,1,2', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,55 @@
+import csv
+import json
+
+from test_base import TestBase
+
+
+class TestNegotiation(TestBase):
+    """Test content negotiation of list responses."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestNegotiation, self).setUp()
+        self.token = self.login()['username']
+
+    def get(self, url, accept):
+        """Requests `url` as the fixture user accepting `accept`."""
+        return self.client.get(
+            url, headers={'username': self.token, 'Accept': accept})
+
+    def test_json_is_the_default(self):
+        """
+        Test that JSON is returned to clients accepting anything.
+        """
+        response = self.get('/goods/', '*/*')
+        self.assertEqual(response.headers.get('Content-Type'),
+                         'application/json')
+        self.assertEqual(response.headers.get('Vary'), 'Accept')
+        self.assertEqual(len(json.loads(response.data)), 2)
+
+    def test_msgpack_response(self):
+        """
+        Test that MessagePack is returned when it is preferred.
+        """
+        for media_type in ('application/x-msgpack', 'application/msgpack'):
+            response = self.get('/goods/', media_type)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers.get('Content-Type'), media_type)
+            # a two item array of four entry maps
+            self.assertEqual(response.data[:2], b'\x92\x84')
+            self.assertIn(b'Silvio Wolf', response.data)
+
+    def test_csv_response(self):
+        """
+        Test that CSV with a header line is streamed when it is preferred.
+        """
+        response = self.get(
+            '/services/', 'text/csv, application/json;q=0.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers.get('Content-Type').startswith('text/csv'))
+        self.assertNotIn('Content-Length', response.headers)
+        rows = list(csv.reader(response.data.splitlines()))
+        self.assertEqual(rows[0], ['id', 'name', 'price'])
+        self.assertEqual(sorted(row[0] for row in rows[1:]), ['1', '2'])
@@ -544,6 +544,9 @@ class TestOutlet(TestBase):
             'username': token
         }
         outlet = self.create_outlet()
+        # the lookup of another user's outlet does not load it, so read the
+        # original values before the request ends the session
+        name, postal_address = outlet.name, outlet.postal_address
         data = {
             'name': self.fake.name(),
             'postal_address': self.fake.street_address()
@@ -552,8 +555,8 @@ class TestOutlet(TestBase):
         self.assertEqual(response.status, '403 FORBIDDEN')
         self.assertEqual(response.status_code, 403)
         not_edited = Outlets.query.get(1)
-        self.assertEqual(outlet.name, not_edited.name)
-        self.assertEqual(outlet.postal_address, not_edited.postal_address)
+        self.assertEqual(name, not_edited.name)
+        self.assertEqual(postal_address, not_edited.postal_address)
 
     def test_outlet_resource_delete_successful(self):
         """
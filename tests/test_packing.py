@@ -0,0 +1,49 @@
+import packing
+from packing import packb
+from test_base import TestBase
+
+
+class TestPacking(TestBase):
+    """Test the pure Python MessagePack encoder."""
+
+    def setUp(self):
+        super(TestPacking, self).setUp()
+        # exercise the fallback even where the msgpack package is installed
+        self.msgpack = packing.msgpack
+        packing.msgpack = None
+
+    def tearDown(self):
+        packing.msgpack = self.msgpack
+        super(TestPacking, self).tearDown()
+
+    def test_packs_scalars(self):
+        """
+        Test that nil, booleans, integers and floats use the smallest format.
+        """
+        self.assertEqual(packb(None), b'\xc0')
+        self.assertEqual(packb(True), b'\xc3')
+        self.assertEqual(packb(False), b'\xc2')
+        self.assertEqual(packb(1), b'\x01')
+        self.assertEqual(packb(-1), b'\xff')
+        self.assertEqual(packb(200), b'\xcc\xc8')
+        self.assertEqual(packb(70000), b'\xce\x00\x01\x11\x70')
+        self.assertEqual(packb(-200), b'\xd1\xff\x38')
+        self.assertEqual(packb(1.5), b'\xcb\x3f\xf8' + b'\x00' * 6)
+
+    def test_packs_strings(self):
+        """
+        Test that text is packed as UTF-8 strings with a length header.
+        """
+        self.assertEqual(packb(u'caf\xe9'), b'\xa5caf\xc3\xa9')
+        self.assertEqual(packb('a' * 40), b'\xd9\x28' + b'a' * 40)
+        self.assertEqual(packb(u'b' * 300)[:3], b'\xda\x01\x2c')
+
+    def test_packs_containers(self):
+        """
+        Test that lists and dicts are packed as arrays and maps.
+        """
+        self.assertEqual(packb([1, [u'a']]), b'\x92\x01\x91\xa1a')
+        self.assertEqual(packb({u'id': 1}), b'\x81\xa2id\x01')
+        self.assertEqual(packb(range(20))[:3], b'\xdc\x00\x14')
+        with self.assertRaises(TypeError):
+            packb(object())
@@ -0,0 +1,94 @@
+import json
+import re
+
+from test_base import TestBase
+from app import app
+from models import db, Goods
+
+
+class TestPagination(TestBase):
+    """Test keyset pagination of list resources."""
+
+    fixtures = ['user.json', 'goods.json']
+
+    def setUp(self):
+        super(TestPagination, self).setUp()
+        db.session.execute(Goods.__table__.insert(), [
+            {'name': 'Good {0}'.format(i), 'price': i, 'necessary': True,
+             'user_id': 1}
+            for i in range(23)
+        ])
+        db.session.commit()
+        self.headers = self.login()
+        self.page_size = app.config['PAGE_SIZE']
+
+    def tearDown(self):
+        app.config['PAGE_SIZE'] = self.page_size
+        super(TestPagination, self).tearDown()
+
+    def next_url(self, response):
+        """Returns the URL of the next page linked by `response`."""
+        link = response.headers.get('Link')
+        if link is None:
+            return None
+        match = re.match(r'<http://localhost(.+)>; rel="next"$', link)
+        self.assertTrue(match)
+        return match.group(1)
+
+    def test_pages_cover_every_row_once(self):
+        """
+        Test that following next links returns every row once, in order.
+        """
+        url = '/goods/?page_size=10'
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.data)
+            self.assertTrue(len(page) <= 10)
+            ids.extend(good.get('id') for good in page)
+            pages += 1
+            url = self.next_url(response)
+        owned = [g.id for g in Goods.query.filter_by(user_id=1)]
+        self.assertEqual(pages, (len(owned) + 9) // 10)
+        self.assertEqual(ids, sorted(owned))
+
+    def test_default_page_size(self):
+        """
+        Test that pages hold `PAGE_SIZE` rows unless asked otherwise.
+        """
+        app.config['PAGE_SIZE'] = 5
+        response = self.client.get('/goods/', headers=self.headers)
+        self.assertEqual(len(json.loads(response.data)), 5)
+        self.assertIn('cursor=', self.next_url(response))
+
+    def test_next_link_keeps_other_arguments(self):
+        """
+        Test that the next link keeps the fields requested.
+        """
+        response = self.client.get(
+            '/goods/?page_size=2&fields=name', headers=self.headers)
+        url = self.next_url(response)
+        self.assertIn('fields=name', url)
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(json.loads(response.data)[0].keys(), ['name'])
+
+    def test_unpaginated_access_is_opt_in(self):
+        """
+        Test that `?paginate=false` returns every row without a next link.
+        """
+        app.config['PAGE_SIZE'] = 5
+        response = self.client.get(
+            '/goods/?paginate=false', headers=self.headers)
+        self.assertEqual(len(json.loads(response.data)),
+                         Goods.query.filter_by(user_id=1).count())
+        self.assertIsNone(response.headers.get('Link'))
+
+    def test_invalid_arguments_are_rejected(self):
+        """
+        Test that forged cursors and out of range page sizes get a 400.
+        """
+        for url in ('/goods/?cursor=forged', '/goods/?page_size=0',
+                    '/goods/?page_size=100000', '/goods/?page_size=ten'):
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,121 @@
+import json
+
+from test_base import TestBase
+from dal import update_owned
+from models import db, Goods, Services, collection_version
+
+
+class TestPatch(TestBase):
+    """Test partial updates with the PATCH http method."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestPatch, self).setUp()
+        self.headers = self.login()
+        self.record_statements()
+
+    def patch(self, url, data, **headers):
+        """Sends `data` as a JSON PATCH request to `url`."""
+        headers.update(self.headers)
+        return self.client.patch(
+            url, data=json.dumps(data), content_type='application/json',
+            headers=headers)
+
+    def test_patch_updates_only_provided_fields(self):
+        """
+        Test that PATCH changes the fields sent and leaves the others as
+        they were.
+        """
+        response = self.patch('/goods/1/', {'necessary': False})
+        self.assertEqual(response.status_code, 200)
+        good = json.loads(response.data)
+        self.assertEqual(good['necessary'], False)
+        self.assertEqual(good['name'], 'Silvio Wolf')
+        self.assertEqual(good['price'], '93')
+
+    def test_patch_accepts_falsy_values(self):
+        """
+        Test that zero and empty values are set rather than ignored.
+        """
+        response = self.patch('/services/1/', {'price': 0, 'name': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            db.session.query(Services.name, Services.price).filter(
+                Services.id == 1).one(), ('', 0))
+
+    def test_patch_accepts_form_data(self):
+        """
+        Test that fields sent as form data are converted to their column
+        type.
+        """
+        response = self.client.patch(
+            '/goods/2/', data={'price': '10', 'necessary': 'true'},
+            headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            db.session.query(Goods.price, Goods.necessary).filter(
+                Goods.id == 2).one(), (10, True))
+
+    def test_return_minimal_skips_the_representation(self):
+        """
+        Test that `Prefer: return=minimal` gets an empty 204 from a single
+        UPDATE statement.
+        """
+        version = collection_version(1, 'goods')
+        del self.statements[:]
+        response = self.patch(
+            '/goods/1/', {'name': 'Bread'}, Prefer='return=minimal')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.data, '')
+        self.assertEqual(
+            response.headers.get('Preference-Applied'), 'return=minimal')
+        goods_statements = [
+            statement for statement in self.statements
+            if 'goods.' in statement or 'UPDATE goods' in statement]
+        self.assertEqual(len(goods_statements), 1)
+        self.assertTrue(goods_statements[0].startswith('UPDATE goods'))
+        self.assertEqual(collection_version(1, 'goods'), version + 1)
+        self.assertEqual(
+            db.session.query(Goods.name).filter(Goods.id == 1).scalar(),
+            'Bread')
+
+    def test_invalid_patches_are_rejected(self):
+        """
+        Test that empty bodies, unknown or read only fields and values of
+        the wrong type get a 400.
+        """
+        for data in ({}, {'colour': 'red'}, {'id': 5}, {'price': 'cheap'},
+                     {'necessary': 'maybe'}, {'name': None}):
+            response = self.patch('/goods/1/', data)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            db.session.query(Goods.name).filter(Goods.id == 1).scalar(),
+            'Silvio Wolf')
+
+    def test_patch_tells_forbidden_from_missing(self):
+        """
+        Test that patching another user's row gets a 403 and a missing row
+        a 404, with or without `Prefer: return=minimal`.
+        """
+        for headers in ({}, {'Prefer': 'return=minimal'}):
+            self.assertEqual(
+                self.patch('/goods/3/', {'name': 'x'}, **headers).status_code,
+                403)
+            self.assertEqual(
+                self.patch(
+                    '/goods/999/', {'name': 'x'}, **headers).status_code,
+                404)
+        self.assertEqual(
+            db.session.query(Goods.name).filter(Goods.id == 3).scalar(),
+            'Mrs. Kaaren Stokes')
+
+    def test_update_without_columns_returns_no_row(self):
+        """
+        Test that update_owned reads nothing back when no columns are asked
+        for.
+        """
+        self.assertEqual(
+            update_owned(Goods, 1, 1, {'name': 'Bread'}), (None, 200))
+        self.assertEqual(update_owned(Goods, 3, 1, {'name': 'x'}), (None, 403))
+        self.assertEqual(update_owned(Goods, 1, 1, {}), (None, 200))
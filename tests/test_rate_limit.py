@@ -0,0 +1,105 @@
+import json
+
+from test_base import TestBase
+from ratelimit import RateLimiter
+from restful.auth import login_limiter
+
+
+class TestRateLimit(TestBase):
+    """Test rate limiting of login and registration attempts."""
+
+    fixtures = ['user.json']
+
+    def setUp(self):
+        super(TestRateLimit, self).setUp()
+        self.capacity = login_limiter.capacity
+        login_limiter.capacity = 2
+
+    def tearDown(self):
+        login_limiter.capacity = self.capacity
+        super(TestRateLimit, self).tearDown()
+
+    def test_bucket_refills_over_time(self):
+        """
+        Test that a bucket blocks once empty and refills with time.
+        """
+        limiter = RateLimiter(capacity=2, period=60)
+        self.assertEqual(limiter.hit('a'), 0)
+        self.assertEqual(limiter.hit('a'), 0)
+        self.assertEqual(limiter.hit('a'), 30)
+        # other keys are not affected
+        self.assertEqual(limiter.hit('b'), 0)
+        level, updated = limiter._buckets['a']
+        limiter._buckets['a'] = (level, updated - 30)
+        self.assertEqual(limiter.hit('a'), 0)
+
+    def test_limiter_memory_is_bounded(self):
+        """
+        Test that the least recently used bucket is dropped when full.
+        """
+        limiter = RateLimiter(capacity=1, period=60, max_keys=2)
+        limiter.hit('a')
+        limiter.hit('b')
+        limiter.hit('c')
+        self.assertEqual(len(limiter), 2)
+        # `a` was dropped, so it starts over with a full bucket
+        self.assertEqual(limiter.hit('a'), 0)
+
+    def test_login_rate_limited_per_username(self):
+        """
+        Test that repeated failed logins for one username get a 429.
+        """
+        user = {
+            'username': 'pythonista',
+            'password': self.fake.password()
+        }
+        for _ in range(2):
+            response = self.client.post('/auth/login/', data=user)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/auth/login/', data=user)
+        self.assertEqual(response.status, '429 TOO MANY REQUESTS')
+        self.assertEqual(response.headers.get('Retry-After'), '30')
+        self.assertEqual(
+            json.loads(response.data),
+            {'message': 'Too many attempts, please try again later'})
+        # a correct password is rejected as well until the bucket refills
+        user['password'] = 'pythonista'
+        response = self.client.post('/auth/login/', data=user)
+        self.assertEqual(response.status_code, 429)
+
+    def test_json_logins_rate_limited_per_username(self):
+        """
+        Test that logins sent as JSON from many addresses are charged to the
+        username.
+        """
+        user = json.dumps({
+            'username': 'pythonista',
+            'password': self.fake.password()
+        })
+        statuses = [
+            self.client.post(
+                '/auth/login/', data=user, content_type='application/json',
+                environ_base={'REMOTE_ADDR': '10.0.0.{0}'.format(i)}
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [400, 400, 429])
+
+    def test_registration_rate_limited_per_address(self):
+        """
+        Test that one client cannot register users faster than the limit.
+        """
+        for _ in range(2):
+            user = {
+                'username': self.fake.user_name() + self.fake.md5()[:6],
+                'password': self.fake.password()
+            }
+            response = self.client.post('/auth/new/', data=user)
+            self.assertEqual(response.status_code, 201)
+        user = {
+            'username': self.fake.user_name() + self.fake.md5()[:6],
+            'password': self.fake.password()
+        }
+        response = self.client.post('/auth/new/', data=user)
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.headers.get('Retry-After'))
@@ -0,0 +1,112 @@
+import json
+import time
+
+from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+
+from test_base import TestBase
+from models import app, User
+
+
+class TestRefresh(TestBase):
+    """Test refreshing of authentication tokens."""
+
+    fixtures = ['user.json', 'goods.json']
+
+    def token(self):
+        """Logs in the fixture user and returns the authentication token."""
+        return self.login()['username']
+
+    def test_successful_refresh(self):
+        """
+        Test that a valid token is exchanged for a new working token that
+        keeps the original login time.
+        """
+        token = self.token()
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        new_token = json.loads(response.data).get('token')
+        self.assertNotEqual(new_token, token)
+        s = Serializer(app.config.get('SECRET_KEY'))
+        self.assertEqual(
+            s.loads(new_token).get('auth_time'),
+            s.loads(token).get('auth_time'))
+        response = self.client.get('/goods/', headers={'username': new_token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh_revokes_the_refreshed_token(self):
+        """
+        Test that a refreshed token stops working, so that logging out with
+        the newest token of a session ends the whole session.
+        """
+        token = self.token()
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        new_token = json.loads(response.data).get('token')
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            '/auth/logout/', headers={'username': new_token})
+        self.assertEqual(response.status_code, 200)
+        for old in (token, new_token):
+            response = self.client.get('/goods/', headers={'username': old})
+            self.assertEqual(response.status_code, 403)
+            response = self.client.post(
+                '/auth/refresh/', headers={'username': old})
+            self.assertEqual(response.status_code, 403)
+
+    def test_refresh_without_token(self):
+        """
+        Test refresh request without an authentication token.
+        """
+        response = self.client.post('/auth/refresh/')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue('Unauthenticated request' in response.data)
+
+    def test_refresh_invalid_token(self):
+        """
+        Test refresh request with a forged authentication token.
+        """
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': self.fake.sha256()})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue('Invalid or expired token' in response.data)
+
+    def test_refresh_logged_out_token(self):
+        """
+        Test that a token cannot be refreshed once its owner logged out.
+        """
+        token = self.token()
+        self.client.get('/auth/logout/', headers={'username': token})
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+
+    def test_refresh_past_maximum_session_lifetime(self):
+        """
+        Test that a session cannot be extended past its maximum lifetime.
+        """
+        lifetime = app.config['AUTH_MAX_SESSION_LIFETIME']
+        with app.app_context():
+            token = User.issue_auth_token(1, 600, time.time() - lifetime)
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+
+    def test_refreshed_token_expires_with_session(self):
+        """
+        Test that a refreshed token never outlives its session.
+        """
+        lifetime = app.config['AUTH_MAX_SESSION_LIFETIME']
+        with app.app_context():
+            token = User.issue_auth_token(1, 600, time.time() - lifetime + 60)
+        response = self.client.post(
+            '/auth/refresh/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        new_token = json.loads(response.data).get('token')
+        s = Serializer(app.config.get('SECRET_KEY'))
+        data, header = s.loads(new_token, return_header=True)
+        self.assertTrue(header['exp'] - header['iat'] <= 60)
@@ -82,4 +82,26 @@ class TestRegistration(TestBase):
         response = self.client.post('/auth/new/', data=user)
         self.assertEqual(response.status, '400 BAD REQUEST')
         self.assertEqual(response.status_code, 400)
-        self.assertTrue(b'User already exists' in response.data)
\ No newline at end of file
+        self.assertTrue(b'User already exists' in response.data)
+
+    def test_registration_existing_username_leaves_session_usable(self):
+        """
+        Test that a rejected duplicate registration does not break later
+        registrations.
+        """
+        user = {
+            'username': 'pythonista',
+            'password': self.fake.password()
+        }
+        response = self.client.post('/auth/new/', data=user)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(b'User already exists' in response.data)
+        username = self.fake.user_name()
+        user = {
+            'username': username,
+            'password': self.fake.password()
+        }
+        response = self.client.post('/auth/new/', data=user)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(User.query.filter_by(username=username).all()), 1)
+        self.assertEqual(len(User.query.all()), 3)
@@ -0,0 +1,55 @@
+import json
+
+from test_base import TestBase
+
+
+class TestRendering(TestBase):
+    """Test encoding of list and detail responses."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestRendering, self).setUp()
+        user = {
+            'username': 'pythonista',
+            'password': 'pythonista'
+        }
+        response = self.client.post('/auth/login/', data=user)
+        self.headers = {'username': json.loads(response.data).get('token')}
+
+    def test_list_response_is_json_array(self):
+        """
+        Test that list responses are encoded once as a JSON array.
+        """
+        response = self.client.get('/goods/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get('Content-Type'),
+                         'application/json')
+        self.assertTrue(response.data.endswith('\n'))
+        goods = json.loads(response.data)
+        self.assertEqual(
+            sorted(good.get('name') for good in goods),
+            ['Mr. Lucas Stracke IV', 'Silvio Wolf'])
+
+    def test_detail_response_is_json_object(self):
+        """
+        Test that detail responses are JSON objects.
+        """
+        response = self.client.get('/goods/1/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        good = json.loads(response.data)
+        self.assertTrue(isinstance(good, dict))
+        self.assertEqual(good.get('id'), 1)
+
+    def test_legacy_responses_are_json_strings(self):
+        """
+        Test that routes that always returned their payload as a JSON string
+        still do.
+        """
+        response = self.client.get('/services/1/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        service = json.loads(response.data)
+        self.assertTrue(isinstance(service, basestring))
+        self.assertEqual(json.loads(service).get('id'), 1)
+        response = self.client.get('/outlets/', headers=self.headers)
+        self.assertEqual(json.loads(json.loads(response.data)), [])
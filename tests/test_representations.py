@@ -0,0 +1,58 @@
+import json
+
+from test_base import TestBase
+from restful.representations import get_encoder, make_dumps, output_json
+from restful.resources import api
+
+
+class TestRepresentations(TestBase):
+    """Test the pluggable JSON representation of responses."""
+
+    fixtures = ['user.json']
+
+    def test_stdlib_encoder_is_always_available(self):
+        """
+        Test that `auto` falls back to an installed JSON module and that
+        modules can be picked by name.
+        """
+        self.assertTrue(hasattr(get_encoder('auto'), 'dumps'))
+        self.assertIs(get_encoder('json'), json)
+        with self.assertRaises(ImportError):
+            get_encoder('no_such_json_module')
+
+    def test_compact_mode_drops_whitespace(self):
+        """
+        Test that compact encoding has no whitespace between items.
+        """
+        data = [{'id': 1, 'name': 'bread'}]
+        self.assertEqual(make_dumps('json', compact=True)(data),
+                         '[{"id":1,"name":"bread"}]')
+        loose = make_dumps('json')(data)
+        self.assertIn(', ', loose)
+        self.assertEqual(json.loads(loose), data)
+
+    def test_auto_encoder_honours_whitespace_and_slashes(self):
+        """
+        Test that `auto` outside of compact mode picks a module that adds
+        whitespace, and that no encoder escapes forward slashes.
+        """
+        self.assertNotEqual(get_encoder('auto').__name__, 'ujson')
+        data = {'url': '/goods/1/', 'id': 1}
+        loose = make_dumps('auto')(data)
+        self.assertIn(', ', loose)
+        self.assertIn('"/goods/1/"', loose)
+        self.assertIn('"/goods/1/"', make_dumps('auto', compact=True)(data))
+
+    def test_api_uses_configured_representation(self):
+        """
+        Test that Flask-RESTful encodes responses with `output_json`.
+        """
+        self.assertIs(api.representations['application/json'], output_json)
+        user = {
+            'username': 'pythonista',
+            'password': 'pythonista'
+        }
+        response = self.client.post('/auth/login/', data=user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data.endswith('\n'))
+        self.assertTrue(json.loads(response.data).get('token'))
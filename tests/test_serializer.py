@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+from test_base import TestBase
+from models import db, Goods, Services, Accounts, Outlets
+from serializer import (
+    GoodsSchema, ServicesSchema, AccountsSchema, OutletSchema, compile_schema,
+    schema_columns
+)
+
+
+class TestCompiledSerializers(TestBase):
+    """Test that compiled serializers dump like their marshmallow schemas."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def assertParity(self, schema_class, obj):
+        """Asserts the compiled and marshmallow dumps of `obj` match."""
+        expected = schema_class().dump(obj).data
+        actual = compile_schema(schema_class)(obj)
+        self.assertEqual(actual, expected)
+        for key, value in expected.items():
+            self.assertEqual(type(actual[key]), type(value))
+
+    def test_dumps_fixture_rows_like_marshmallow(self):
+        """
+        Test that rows loaded from the database are dumped identically.
+        """
+        rows = Goods.query.all() + Services.query.all()
+        self.assertTrue(rows)
+        for row in rows:
+            schema_class = GoodsSchema if isinstance(row, Goods) \
+                else ServicesSchema
+            self.assertParity(schema_class, row)
+
+    def test_dumps_transient_objects_like_marshmallow(self):
+        """
+        Test that byte and unicode strings, numbers and booleans are
+        converted the way marshmallow converts them.
+        """
+        self.assertParity(
+            GoodsSchema, Goods(id=3, name='bread', price=45, necessary=1))
+        self.assertParity(
+            GoodsSchema, Goods(id=4, name=u'caf\xe9', price=u'12',
+                               necessary='false'))
+        self.assertParity(
+            AccountsSchema, Accounts(name=u'KPLC', phone_no='0700000000',
+                                     account_no=u'123',
+                                     account_provider='M-Pesa'))
+        self.assertParity(
+            OutletSchema, Outlets(u'Naivas', 'P.O. Box 1', u'Nairobi'))
+
+    def test_none_values_stay_none(self):
+        """
+        Test that fields set to None are dumped as None.
+        """
+        self.assertParity(GoodsSchema, Goods(id=None, name=None))
+        self.assertParity(ServicesSchema, Services())
+
+    def test_missing_attributes_are_left_out(self):
+        """
+        Test that attributes the object does not have are not dumped.
+        """
+        Row = namedtuple('Row', ['id', 'name'])
+        self.assertParity(GoodsSchema, Row(1, 'bread'))
+        self.assertEqual(
+            compile_schema(GoodsSchema)(Row(1, 'bread')),
+            {'id': 1, 'name': u'bread'})
+
+    def test_only_restricts_fields(self):
+        """
+        Test that only the requested fields are dumped.
+        """
+        good = Goods(id=3, name='bread', price=45, necessary=True)
+        dump = compile_schema(GoodsSchema, only=['name', 'id'])
+        self.assertEqual(dump(good), GoodsSchema(only=('id', 'name')).dump(
+            good).data)
+        self.assertIs(dump, compile_schema(GoodsSchema, only=['id', 'name']))
+
+    def test_projected_rows_dump_like_model_instances(self):
+        """
+        Test that rows of the serialized columns dump like model instances.
+        """
+        dump = compile_schema(GoodsSchema)
+        query = db.session.query(*schema_columns(Goods, GoodsSchema))
+        projected = sorted(query.all(), key=lambda row: row.id)
+        goods = Goods.query.order_by(Goods.id).all()
+        self.assertFalse(isinstance(projected[0], Goods))
+        self.assertEqual([dump(row) for row in projected],
+                         [dump(good) for good in goods])
+
+    def test_schema_columns_honours_only(self):
+        """
+        Test that only the columns of the requested fields are returned.
+        """
+        columns = schema_columns(Goods, GoodsSchema, only=['name', 'id'])
+        self.assertEqual(sorted(column.key for column in columns),
+                         ['id', 'name'])
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+
+from test_base import TestBase
+from models import (
+    app, db, User, AuthRevocation, AuthSession, session_store, revoked_tokens
+)
+
+
+class TestSessions(TestBase):
+    """Test write-behind persistence of authentication sessions."""
+
+    fixtures = ['user.json']
+
+    def token(self):
+        """Logs in the fixture user and returns the authentication token."""
+        return self.login()['username']
+
+    def test_login_does_not_write_user(self):
+        """
+        Test that logging in only records a pending session.
+        """
+        self.token()
+        self.assertFalse(User.query.get(1).is_active)
+        self.assertEqual(session_store.pending, 1)
+        self.assertEqual(AuthSession.query.count(), 0)
+
+    def test_flush_persists_sessions(self):
+        """
+        Test that pending logins and logouts are written in one flush.
+        """
+        token = self.token()
+        self.token()
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        session_store.flush()
+        self.assertEqual(session_store.pending, 0)
+        sessions = AuthSession.query.filter_by(user_id=1).all()
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(len([s for s in sessions if s.revoked_at]), 1)
+
+    def test_flush_when_batch_is_full(self):
+        """
+        Test that sessions are flushed after a request once the batch is full.
+        """
+        flush_size = session_store.flush_size
+        session_store.flush_size = 2
+        try:
+            self.token()
+            self.assertEqual(AuthSession.query.count(), 0)
+            self.token()
+        finally:
+            session_store.flush_size = flush_size
+        self.assertEqual(session_store.pending, 0)
+        self.assertEqual(AuthSession.query.count(), 2)
+
+    def test_sync_revokes_sessions_closed_elsewhere(self):
+        """
+        Test that tokens revoked by another process are revoked on sync.
+        """
+        now = datetime.utcnow()
+        db.session.add(AuthRevocation(
+            token_id='closed', revoked_at=now,
+            expires_at=now + timedelta(minutes=10)))
+        db.session.add(AuthRevocation(
+            token_id='expired', revoked_at=now,
+            expires_at=now - timedelta(minutes=1)))
+        db.session.commit()
+        session_store.sync()
+        self.assertTrue('closed' in revoked_tokens)
+        self.assertFalse('expired' in revoked_tokens)
+
+    def test_revocations_are_synced_before_authenticating(self):
+        """
+        Test that a token revoked by another process is rejected by the first
+        request once a sync is due.
+        """
+        token = self.token()
+        response = self.client.get('/accounts/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        data = Serializer(app.config.get('SECRET_KEY')).loads(token)
+        now = datetime.utcnow()
+        db.session.add(AuthRevocation(
+            token_id=data.get('jti'), revoked_at=now,
+            expires_at=now + timedelta(minutes=10)))
+        db.session.commit()
+        session_store._last_sync -= session_store.sync_interval
+        response = self.client.get('/accounts/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+
+    def test_logout_is_written_straight_away(self):
+        """
+        Test that logging out writes the revocation at the end of the
+        request, even while the session itself is only pending elsewhere.
+        """
+        token = self.token()
+        # the session was opened by another process that has not flushed it
+        session_store.clear()
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_store.pending, 0)
+        self.assertEqual(AuthSession.query.count(), 0)
+        self.assertEqual(AuthRevocation.query.count(), 1)
+        revoked_tokens.clear()
+        session_store.sync()
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+
+    def test_failed_flush_keeps_changes_pending(self):
+        """
+        Test that changes are kept for the next flush when a write fails.
+        """
+        self.token()
+        table = session_store.table
+        session_store.table = AuthSession.__table__.tometadata(
+            db.MetaData(), name='missing')
+        try:
+            self.assertRaises(Exception, session_store.flush)
+            self.assertEqual(session_store.pending, 1)
+        finally:
+            session_store.table = table
+        session_store.flush()
+        self.assertEqual(session_store.pending, 0)
+        self.assertEqual(AuthSession.query.count(), 1)
+
+    def test_logout_twice(self):
+        """
+        Test that a token can only be logged out once.
+        """
+        token = self.token()
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue('User is not logged in' in response.data)
@@ -0,0 +1,78 @@
+import json
+
+from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+
+from test_base import TestBase
+from models import db, app, User, revoked_tokens
+
+
+class TestStatelessAuth(TestBase):
+    """Test authorization from token claims when AUTH_STATELESS is enabled."""
+
+    fixtures = ['user.json', 'goods.json']
+
+    def setUp(self):
+        super(TestStatelessAuth, self).setUp()
+        app.config['AUTH_STATELESS'] = True
+
+    def tearDown(self):
+        app.config['AUTH_STATELESS'] = False
+        super(TestStatelessAuth, self).tearDown()
+
+    def login(self):
+        """Logs in the fixture user and returns the authentication token."""
+        user = {
+            'username': 'pythonista',
+            'password': 'pythonista'
+        }
+        response = self.client.post('/auth/login/', data=user)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data).get('token')
+
+    def test_token_claims(self):
+        """
+        Test that the token carries the user id, active flag and a token id.
+        """
+        token = self.login()
+        with app.app_context():
+            identity = User.authenticate_token(token)
+        self.assertEqual(identity.user_id, 1)
+        self.assertTrue(identity.is_active)
+        self.assertTrue(identity.issued_at)
+        self.assertTrue(identity.token_id)
+
+    def test_list_request_does_not_load_user(self):
+        """
+        Test that a valid token authorizes a request without the user row.
+        """
+        token = self.login()
+        # remove the user row so that any attempt to load it would fail
+        db.session.execute('DELETE FROM user WHERE user_id = 1')
+        db.session.commit()
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue('Silvio Wolf' in response.data)
+
+    def test_inactive_token_is_rejected(self):
+        """
+        Test that a token whose active claim is false is rejected.
+        """
+        s = Serializer(app.config.get('SECRET_KEY'), expires_in=600)
+        token = s.dumps({'id': 1, 'active': False, 'jti': self.fake.md5()})
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue('Invalid token' in response.data)
+
+    def test_logout_revokes_token(self):
+        """
+        Test that a token can no longer be used once its owner logs out.
+        """
+        token = self.login()
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(revoked_tokens), 1)
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue('Invalid token' in response.data)
@@ -0,0 +1,64 @@
+import json
+
+from test_base import TestBase
+from app import app
+
+
+class TestStreaming(TestBase):
+    """Test streaming of list responses."""
+
+    fixtures = ['user.json', 'goods.json', 'services.json']
+
+    def setUp(self):
+        super(TestStreaming, self).setUp()
+        self.headers = self.login()
+        self.config = dict(app.config)
+
+    def tearDown(self):
+        app.config.update(self.config)
+        super(TestStreaming, self).tearDown()
+
+    def test_stream_query_argument_streams_list(self):
+        """
+        Test that `?stream=true` streams the same array as a plain request.
+        """
+        plain = self.client.get('/goods/', headers=self.headers)
+        streamed = self.client.get('/goods/?stream=true', headers=self.headers)
+        self.assertEqual(streamed.status_code, 200)
+        self.assertNotIn('Content-Length', streamed.headers)
+        self.assertIn('Content-Length', plain.headers)
+        self.assertEqual(streamed.headers.get('Content-Type'),
+                         'application/json')
+        self.assertEqual(json.loads(streamed.data), json.loads(plain.data))
+
+    def test_batches_are_joined_into_one_array(self):
+        """
+        Test that rows streamed over several batches form a valid array.
+        """
+        app.config['STREAM_BATCH_SIZE'] = 1
+        response = self.client.get(
+            '/services/?stream=1', headers=self.headers)
+        services = json.loads(response.data)
+        self.assertEqual(len(services), 2)
+        self.assertEqual(sorted(s.get('id') for s in services), [1, 2])
+
+    def test_stream_lists_setting(self):
+        """
+        Test that lists are streamed by default once `STREAM_LISTS` is enabled
+        and that requests can still opt out.
+        """
+        app.config['STREAM_LISTS'] = True
+        response = self.client.get('/goods/', headers=self.headers)
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(len(json.loads(response.data)), 2)
+        response = self.client.get('/goods/?stream=false', headers=self.headers)
+        self.assertIn('Content-Length', response.headers)
+
+    def test_empty_list_is_streamed_as_empty_array(self):
+        """
+        Test that a user without rows gets an empty array.
+        """
+        response = self.client.get(
+            '/accounts/?stream=true', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), [])
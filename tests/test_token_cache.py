@@ -0,0 +1,95 @@
+import json
+import time
+
+from test_base import TestBase
+from models import db, User, token_cache
+from tokens import AuthIdentity, TokenCache
+
+
+class TestTokenCache(TestBase):
+    """Test caching of verified authentication tokens."""
+
+    fixtures = ['user.json', 'goods.json']
+
+    def login(self, username='pythonista'):
+        """Logs in a fixture user and returns the authentication token."""
+        user = {
+            'username': username,
+            'password': 'pythonista'
+        }
+        response = self.client.post('/auth/login/', data=user)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data).get('token')
+
+    def test_cache_evicts_least_recently_used_token(self):
+        """
+        Test that the oldest unused token is dropped once the cache is full.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', AuthIdentity(1, True, None, 'a'))
+        cache.set('b', AuthIdentity(2, True, None, 'b'))
+        # touch `a` so that `b` becomes the least recently used entry
+        self.assertTrue(cache.get('a'))
+        cache.set('c', AuthIdentity(3, True, None, 'c'))
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('c'))
+
+    def test_cache_honours_token_expiry(self):
+        """
+        Test that an entry is not served past the expiry of its token.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', AuthIdentity(1, True, None, 'a'), time.time() - 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_cache_invalidate_user(self):
+        """
+        Test that all tokens of a user are dropped when the user is
+        invalidated.
+        """
+        cache = TokenCache(max_size=10, ttl=60)
+        cache.set('a', AuthIdentity(1, True, None, 'a'))
+        cache.set('b', AuthIdentity(1, True, None, 'a'))
+        cache.set('c', AuthIdentity(2, True, None, 'c'))
+        cache.invalidate_user(1)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('c'))
+
+    def test_authenticated_request_caches_token(self):
+        """
+        Test that a verified token is served from the cache on later requests.
+        """
+        token = self.login()
+        response = self.client.get('/goods/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        identity = token_cache.get(token)
+        self.assertEqual(identity.user_id, 1)
+        self.assertTrue(identity.token_id)
+
+    def test_user_change_invalidates_cached_token(self):
+        """
+        Test that updating a user drops the cached identities of that user.
+        """
+        token = self.login()
+        self.client.get('/goods/', headers={'username': token})
+        self.assertTrue(token_cache.get(token))
+        user = User.query.get(1)
+        user.username = self.fake.user_name()
+        db.session.add(user)
+        db.session.commit()
+        self.assertIsNone(token_cache.get(token))
+
+    def test_logout_invalidates_cached_token(self):
+        """
+        Test that logging out drops the cached identity of the token.
+        """
+        token = self.login()
+        self.client.get('/goods/', headers={'username': token})
+        self.assertTrue(token_cache.get(token))
+        response = self.client.get('/auth/logout/', headers={'username': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(token_cache.get(token))
@@ -0,0 +1,148 @@
+import time
+import threading
+from collections import namedtuple, OrderedDict
+
+
+AuthIdentity = namedtuple(
+    'AuthIdentity', ['user_id', 'is_active', 'issued_at', 'token_id'])
+
+
+class TokenCache(object):
+    """
+    Bounded token -> user identity cache.
+
+    Entries are evicted in least recently used order once `max_size` is
+    reached and expire at whichever comes first of the token's own expiry or
+    `ttl` seconds after being cached.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        """
+        Instantiates class instance variables upon object instance creation.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._user_tokens = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        """
+        Returns the identity cached for `token` or None if it is missing or
+        has expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is None:
+                return None
+            identity, expires_at = entry
+            if expires_at <= time.time():
+                self._forget(token, identity.user_id)
+                return None
+            # re-insert to mark the token as most recently used
+            self._entries[token] = entry
+            return identity
+
+    def set(self, token, identity, expires_at=None):
+        """
+        Caches `identity` for `token` until `expires_at` (a unix timestamp) or
+        the cache ttl, whichever comes first.
+        """
+        if self.max_size <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            old = self._entries.pop(token, None)
+            if old is not None:
+                self._forget(token, old[0].user_id)
+            while len(self._entries) >= self.max_size:
+                stale_token, (stale, _) = self._entries.popitem(last=False)
+                self._forget(stale_token, stale.user_id)
+            self._entries[token] = (identity, deadline)
+            self._user_tokens.setdefault(identity.user_id, set()).add(token)
+
+    def invalidate(self, token):
+        """
+        Drops `token` from the cache.
+        """
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is not None:
+                self._forget(token, entry[0].user_id)
+
+    def invalidate_user(self, user_id):
+        """
+        Drops every cached token belonging to the user of id `user_id`.
+        """
+        with self._lock:
+            for token in self._user_tokens.pop(user_id, ()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def _forget(self, token, user_id):
+        tokens = self._user_tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[user_id]
+
+
+class RevocationSet(object):
+    """
+    In-memory set of revoked token ids.
+
+    Each id is only kept until the token it belongs to expires, after which
+    the token would be rejected anyway, so the set stays proportional to the
+    number of tokens revoked within one token lifetime.
+    """
+
+    def __init__(self, purge_interval=60):
+        """
+        Instantiates class instance variables upon object instance creation.
+        """
+        self.purge_interval = purge_interval
+        self._expiry = {}
+        self._next_purge = time.time() + purge_interval
+        self._lock = threading.Lock()
+
+    def __contains__(self, token_id):
+        expires_at = self._expiry.get(token_id)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def add(self, token_id, expires_at):
+        """
+        Revokes the token of id `token_id` until `expires_at`.
+        """
+        with self._lock:
+            self._expiry[token_id] = expires_at
+            if time.time() >= self._next_purge:
+                self._purge()
+
+    def clear(self):
+        """
+        Empties the set.
+        """
+        with self._lock:
+            self._expiry.clear()
+
+    def _purge(self):
+        now = time.time()
+        for token_id, expires_at in list(self._expiry.items()):
+            if expires_at <= now:
+                del self._expiry[token_id]
+        self._next_purge = now + self.purge_interval